@@ -1,10 +1,48 @@
 
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from scipy import signal
+import matplotlib
+import functools
+import hashlib
+import hmac
+import io
+import os
 import time
+import uuid
+
+import canvas_scope
+import engine
+import grading
+import noise_bank
+import prefetch
+import profiling
+import streaming
+import warmup
+from class_store import class_store
+from decimation import minmax_decimate, xy_decimate
+from regression import MeasurementTable
+from render_cache import frame_seed, phase_frame_key, quantize, shared_cache
+
+# Non-GUI backend up front; matplotlib, scipy and pandas themselves are imported
+# by the procedures that need them and warmed in the background after the first render.
+matplotlib.use("Agg")
+
+# Sidebar image and schematics are local SVGs in static/ (see build_assets.py), served by
+# Streamlit; reruns keep the same <img> URL, so the browser neither refetches them nor lays
+# out DOT, and the app works offline. The URLs carry a content hash, so a reverse proxy can
+# serve app/static/ as immutable (Streamlit itself sends no Cache-Control for it)
+STATIC_URL = "app/static"
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+@functools.lru_cache(maxsize=None)
+def static_url(name):
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        version = hashlib.sha1(f.read()).hexdigest()[:10]
+    return f"{STATIC_URL}/{name}?v={version}"
+
+# Teacher tools (class results and their reset, the Δt annotation) are shown only after
+# entering this password; with SIMULADOR_TEACHER_PASSWORD unset they are not offered at all
+TEACHER_PASSWORD = os.environ.get("SIMULADOR_TEACHER_PASSWORD", "")
 
 # --- Configuration ---
 st.set_page_config(
@@ -39,54 +77,263 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Per-session randomness comes from one Generator with a recorded seed, so a session can be replayed;
+# screen noise is sliced from the shared noise bank by frame, so the same inputs give the same trace
+noise_seed = st.session_state.setdefault('noise_seed', noise_bank.new_session_seed())
+if 'rng' not in st.session_state:
+    st.session_state.rng = np.random.default_rng(noise_seed)
+
 # --- Sidebar: Configuration ---
 with st.sidebar:
-    st.image("https://upload.wikimedia.org/wikipedia/commons/thumb/c/c3/Oscilloscope_sine_square.jpg/640px-Oscilloscope_sine_square.jpg", use_column_width=True, caption="Osciloscópio")
+    st.markdown(f"![Osciloscópio]({static_url('osciloscopio.svg')})")
+    st.caption("Osciloscópio")
     st.header("Configuração Ambiental")
     temperature = st.number_input(r"Temperatura do Ar ($^\circ$C)", min_value=-20.0, max_value=40.0, value=20.0, step=0.1)
     
     # Theoretical Calculation
     # v = 331.29 + 0.61 * T
-    v_theo = 331.29 + 0.61 * temperature
+    v_theo = float(engine.speed_of_sound(temperature))
     # st.metric(label="Velocidade Teórica do Som", value=f"{v_theo:.2f} m/s") # Hidden for student challenge
     
+    st.markdown("---")
+    st.header("Osciloscópio")
+    # "Real scope" mode: MS/s records decimated (min/max per pixel column) before display
+    sample_rate = st.selectbox("Modo de aquisição", [None] + list(engine.SAMPLE_RATES),
+        format_func=lambda fs: "Simplificado" if fs is None else f"Real ({fs / 1e6:g} MS/s)")
+    # Procedure I: lossy hose (attenuation, dispersion, end reflection) or the plain delayed copy
+    impulse_model = "hose" if st.checkbox("Mangueira realista (atenuação, dispersão e eco)", value=True) else "delay"
+    
     st.markdown("---")
     st.header("Navegação")
     procedure = st.radio("Escolha o Procedimento:", 
         ["1. Método do Impulso/Eco", "2. Método do Desfasamento", "3. Análise de Dados"])
 
+    teacher = annotate_dt = False
+    if TEACHER_PASSWORD:
+        st.markdown("---")
+        with st.expander("👩‍🏫 Professor"):
+            password = st.text_input("Palavra-passe do professor", type="password")
+            teacher = hmac.compare_digest(password.encode(), TEACHER_PASSWORD.encode())
+            if password and not teacher:
+                st.caption("Palavra-passe incorreta.")
+            # Prints the Δt "Verificar Tempo" grades against: never shown to students
+            annotate_dt = teacher and st.checkbox(r"Anotar $\Delta t$ estimado no osciloscópio")
+
+    st.markdown("---")
+    with st.expander("Desempenho"):
+        # Draw the oscilloscope in the browser from raw samples; the PNG path is the fallback
+        browser_scope = st.checkbox("Desenhar osciloscópio no navegador", value=canvas_scope.available(),
+                                    disabled=not canvas_scope.available())
+        cache_stats = shared_cache().stats()
+        st.caption(f"Cache de ecrãs: {cache_stats['entries']} imagens ({cache_stats['bytes'] / 1e6:.1f} MB), "
+                   f"{cache_stats['hits'] + cache_stats['disk_hits']} acertos / {cache_stats['misses']} falhas "
+                   f"({cache_stats['hit_rate']:.0%})")
+        st.caption(f"Semente aleatória da sessão: {noise_seed}")
+        # Teacher panel: time (and optionally allocations) of each stage of the last rerun
+        show_profile = st.checkbox("Perfil de cada interação (professor)")
+        # Allocation tracing is process-wide: only offered when the server allows it (SIMULADOR_PROFILE_ALLOC=ui)
+        trace_alloc = (show_profile and profiling.ALLOC_MODE == "ui"
+                       and st.checkbox("Medir alocações (tracemalloc, torna o servidor mais lento)"))
+        profile_panel = st.empty()
+
     st.markdown("---")
     st.markdown("**Sobre:** Simulador da A.L. 2.2 - Velocidade de propagação do som.")
 
+# Stage timings of this rerun, tagged with the session and procedure
+session_tag = st.session_state.setdefault('session_tag', uuid.uuid4().hex[:8])
+if profiling.ALLOC_MODE == "ui":
+    profiling.trace_allocations(session_tag, trace_alloc)
+profiling.begin(session_tag, procedure)
+# Background rendering of the neighbouring slider positions waits while any script run is in progress
+prefetcher = prefetch.prefetcher()
+if prefetcher:
+    prefetcher.foreground_started()
+
 # --- Helper Functions ---
-def generate_pulse(t, t0, width=0.002):
-    return np.exp(-((t - t0)**2) / (2 * width**2))
+ANIMATION_SECONDS = 3.2    # length of the wood-block/hose CSS animation
+REVEAL_POLL_SECONDS = 0.5  # fragment timer used to reveal the screen after it
 
-def plot_oscilloscope(time, ch1, ch2, t_range, y_range=(-1, 1), trigger_level=0.1):
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.set_facecolor("#1e1e1e")  # Oscilloscope screen color
-    ax.grid(color="#444", linestyle='--', linewidth=0.5)
-    
-    # Plot signals
-    ax.plot(time * 1000, ch1, color="#00ff00", linewidth=1.5, label="CH1 (Fonte/Gerador)")
-    ax.plot(time * 1000, ch2, color="#ffff00", linewidth=1.5, label="CH2 (Recetor/Microfone)")
-    
-    # Setup axis
-    ax.set_xlabel("Tempo (ms)", fontsize=12)
-    ax.set_ylabel("Tensão (V)", fontsize=12)
-    ax.set_xlim(t_range[0]*1000, t_range[1]*1000)
-    ax.set_ylim(y_range)
-    
-    # Add minor ticks for grid
-    ax.minorticks_on()
-    ax.grid(which='major', color='#888888', linestyle='-', linewidth=1.0) # Brighter, thicker major grid
-    ax.grid(which='minor', color='#444444', linestyle=':', linewidth=0.6) # Brighter minor grid
-    
-    # Legend
-    legend = ax.legend(loc='upper right', facecolor='#333', edgecolor='white', labelcolor='white')
-    
-    plt.tight_layout()
-    return fig
+def plot_regression(X, y, fit):
+    from matplotlib.figure import Figure
+    fig_reg = Figure(figsize=(6, 4))
+    ax_reg = fig_reg.add_subplot()
+    ax_reg.scatter(X, y, color='red', label='Dados')
+    ax_reg.plot(X, fit.slope*X + fit.intercept, color='blue', label=f'Ajuste Linear ($v={fit.slope:.1f}$ m/s)')
+    ax_reg.set_xlabel("Tempo (s)")
+    ax_reg.set_ylabel("Distância (m)")
+    ax_reg.legend()
+    ax_reg.grid(True, linestyle='--', alpha=0.7)
+    buf = io.BytesIO()
+    fig_reg.savefig(buf, format="png", bbox_inches="tight", dpi=150)
+    return buf.getvalue()
+
+# Trials offered in the app, per Procedure I model and for Procedure II: each run blocks this
+# session's script thread, so the largest takes under 2 s on one core (the lossy hose costs
+# ~0.55 ms per trial); more with `python montecarlo.py`, which can use several processes
+MC_TRIALS = {"hose": [200, 500, 1_000, 3_000], "delay": [500, 1_000, 2_000, 5_000],
+             "phase": [100, 200, 500, 1_000]}
+MC_CHUNK = 256  # traces synthesized at once: ~50 MB above the app's own footprint
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_monte_carlo(procedure, temperature, trials, model="delay"):
+    # Only summaries and the histogram are cached, not the per-trial arrays
+    import montecarlo
+    kwargs = {"model": model} if procedure == "impulse" else {}
+    mc = montecarlo.run(procedure, temperature, trials, chunk=MC_CHUNK, **kwargs)
+    counts, edges = np.histogram(mc['v'], bins=60)
+    rows = {"v (m/s)": montecarlo.summarize(mc['v']), "Erro (%)": montecarlo.summarize(mc['error_pct'])}
+    if procedure == "impulse":
+        rows = {"Δt (ms)": montecarlo.summarize(mc['dt'] * 1000), **rows}
+    return {"v_theo": mc['v_theo'], "elapsed_s": mc['elapsed_s'], "trials_per_s": mc['trials_per_s'],
+            "v_hist": (counts, edges), "summary": rows}
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_sweep(temperature):
+    import sweep
+    return sweep.run(temperature)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def plot_phase_map(temperature):
+    from matplotlib.figure import Figure
+    result = run_sweep(temperature)
+    fig_map = Figure(figsize=(7, 4))
+    ax_map = fig_map.add_subplot()
+    mesh = ax_map.pcolormesh(result['dists'], result['freqs'], result['phase_deg'], cmap='twilight', vmin=0, vmax=360, shading='nearest')
+    fig_map.colorbar(mesh, ax=ax_map, label=r"$\Delta \phi$ (°)")
+    in_phase = result['coincidences']
+    ax_map.plot(np.concatenate(in_phase), np.repeat(result['freqs'], [len(d) for d in in_phase]), 'o', color='white', markersize=3)
+    ax_map.set_xlabel("Distância (m)")
+    ax_map.set_ylabel("Frequência (Hz)")
+    ax_map.set_title("Desfasamento CH1/CH2 (○ sinais em fase)")
+    buf = io.BytesIO()
+    fig_map.savefig(buf, format="png", bbox_inches="tight", dpi=120)
+    return buf.getvalue()
+
+def plot_histogram(values, v_theo, label, ylabel="Ensaios", bins=60, weights=None):
+    from matplotlib.figure import Figure
+    fig_mc = Figure(figsize=(6, 3))
+    ax_mc = fig_mc.add_subplot()
+    ax_mc.hist(values, bins=bins, weights=weights, color='#4c72b0', alpha=0.8)
+    ax_mc.axvline(v_theo, color='red', linestyle='--', label=f'$v$ teórica = {v_theo:.1f} m/s')
+    ax_mc.set_xlabel(label)
+    ax_mc.set_ylabel(ylabel)
+    ax_mc.legend()
+    buf = io.BytesIO()
+    fig_mc.savefig(buf, format="png", bbox_inches="tight", dpi=120)
+    return buf.getvalue()
+
+def get_oscilloscope():
+    # One persistent renderer per session: axes, grid and legend are built once and
+    # only the traces/limits change between reruns. It dies with the session state.
+    if 'oscilloscope' not in st.session_state or st.session_state.oscilloscope.closed:
+        from oscilloscope import OscilloscopeRenderer
+        st.session_state.oscilloscope = OscilloscopeRenderer()
+    return st.session_state.oscilloscope
+
+def impulse_noise(t, measured_time, seed):
+    # Noise of a clap's record: fixed per session, clap and time base, so reruns don't flicker
+    key = ("p1", seed, measured_time, len(t), float(t[-1]))
+    return noise_bank.BankedNoise(frame_seed(key))
+
+# Frame synthesis and rendering take all their inputs as arguments (no session state),
+# so the prefetcher's worker threads can produce exactly the frames a rerun would
+def synthesize_impulse_record(measured_time, view_range_ms, sample_rate, model, temperature, seed):
+    # Pulse 1 near t=0, pulse 2 attenuated at t_pulse1 + measured_time (with noise)
+    with profiling.section("synthesis"):
+        if sample_rate:
+            # Only the visible window is acquired, then reduced to screen width
+            t = engine.acquisition_time_base(view_range_ms / 1000, sample_rate)
+        else:
+            t = engine.impulse_time_base()
+        sig1, sig2 = engine.synthesize_impulse(t, measured_time, rng=impulse_noise(t, measured_time, seed),
+                                               model=model, temperature=temperature)
+    with profiling.section("decimation"):
+        return minmax_decimate(t, sig1, sig2)
+
+def impulse_frame_key(measured_time, view_range_ms, sample_rate, model, temperature, seed):
+    return ("p1", seed, measured_time, quantize(view_range_ms, 1.0), int(sample_rate) if sample_rate else 0,
+            model, quantize(temperature, 0.1))
+
+def render_impulse_frame(measured_time, view_range_ms, sample_rate, model, temperature, seed, renderer):
+    record = synthesize_impulse_record(measured_time, view_range_ms, sample_rate, model, temperature, seed)
+    with profiling.section("scope_render"):
+        return renderer.render_png(*record, (0, view_range_ms / 1000))
+
+def impulse_job(*frame):
+    # (cache key, render(renderer)) of one Procedure I frame, for the cache and the prefetcher
+    return impulse_frame_key(*frame), functools.partial(render_impulse_frame, *frame)
+
+def synthesize_phase_record(freq, dist, temperature, sample_rate):
+    # Source sine (CH1) and mic sine delayed by dist/v with noise (CH2), the noise fixed by the frame key
+    with profiling.section("synthesis"):
+        rng = noise_bank.BankedNoise(frame_seed(phase_frame_key(freq, dist, temperature, sample_rate=sample_rate)))
+        n = engine.record_length(engine.phase_window(freq), sample_rate) if sample_rate else engine.PHASE_SAMPLES
+        return engine.synthesize_phase_shift(freq, dist, temperature, n=n, rng=rng)
+
+def phase_png_key(freq, dist, temperature, sample_rate, xy_mode):
+    # The screen is a pure function of the quantized sliders: rendered frames are shared by all sessions
+    key = phase_frame_key(freq, dist, temperature, sample_rate=sample_rate)
+    return key + ("xy",) if xy_mode else key
+
+def render_phase_png(renderer, record, xy_mode):
+    if xy_mode:
+        sig1, sig2 = xy_decimate(record[1], record[2])
+        with profiling.section("scope_render"):
+            return renderer.render_xy_png(sig1, sig2, (-1.5, 1.5), (-1.5, 1.5))
+    with profiling.section("decimation"):
+        t, sig1, sig2 = minmax_decimate(*record)
+    with profiling.section("scope_render"):
+        return renderer.render_png(t, sig1, sig2, (0, t[-1]), (-1.5, 1.5))
+
+def render_phase_frame(freq, dist, temperature, sample_rate, xy_mode, renderer):
+    return render_phase_png(renderer, synthesize_phase_record(freq, dist, temperature, sample_rate), xy_mode)
+
+def phase_job(*frame):
+    # (cache key, render(renderer)) of one Procedure II frame, for the prefetcher
+    return phase_png_key(*frame), functools.partial(render_phase_frame, *frame)
+
+def plot_oscilloscope(time, ch1, ch2, t_range, y_range=(-1, 1), key=None):
+    if browser_scope:
+        with profiling.section("scope_send"):
+            # A fixed key keeps the same canvas across frames instead of remounting it
+            canvas_scope.show(time, ch1, ch2, t_range, y_range, key=key)
+        return
+    with profiling.section("scope_render"):
+        png = get_oscilloscope().render_png(time, ch1, ch2, t_range, y_range)
+    with profiling.section("scope_send"):
+        st.image(png, width="stretch")
+
+def plot_lissajous(ch1, ch2, v_range=(-1.5, 1.5), key=None):
+    # XY screen: same arrays, same canvas component / persistent renderer as the time traces
+    ch1, ch2 = xy_decimate(ch1, ch2)
+    if browser_scope:
+        with profiling.section("scope_send"):
+            canvas_scope.show_xy(ch1, ch2, v_range, v_range, key=key)
+        return
+    with profiling.section("scope_render"):
+        png = get_oscilloscope().render_xy_png(ch1, ch2, v_range, v_range)
+    with profiling.section("scope_send"):
+        st.image(png, width="stretch")
+
+def show_measured_phase(ch1, ch2):
+    with profiling.section("phase_estimate"):
+        import analysis
+        phase = float(analysis.hilbert_phase(ch1, ch2))
+    st.markdown(rf"Desfasamento de fase (medido, transformada de Hilbert): $\Delta \phi = {phase:.1f}^\circ$")
+
+def show_profile_panel(record):
+    summary = profiling.recorder().summary(record["procedure"])
+    rows = [{"Etapa": name,
+             "Este rerun (ms)": f"{stage['s'] * 1000:.1f}",
+             "Alocado (KB)": "-" if stage["alloc_bytes"] is None else f"{stage['alloc_bytes'] / 1024:.0f}",
+             "P50 (ms)": f"{summary[name]['p50_s'] * 1000:.1f}",
+             "P95 (ms)": f"{summary[name]['p95_s'] * 1000:.1f}"}
+            for name, stage in record["stages"].items()]
+    with profile_panel.container():
+        st.caption(f"Rerun: {record['total_s'] * 1000:.0f} ms · sessões ativas: {profiling.recorder().active_sessions()} "
+                   f"· P50/P95 de todas as sessões")
+        if rows:
+            st.table(rows)
 
 # --- Main Content ---
 st.title("🔊 A.L. 2.2: Velocidade de Propagação do Som")
@@ -106,19 +353,7 @@ if procedure == "1. Método do Impulso/Eco":
         """)
         
         # Schematic for Procedure I
-        st.graphviz_chart("""
-        digraph G {
-            rankdir=LR;
-            node [shape=box, style=filled, fillcolor="#faebd7"];
-            Source [label="Fonte Sonora\n(Blocos de Madeira)", fillcolor="#deb887"];
-            Mic [label="Microfone"];
-            Osc [label="Osciloscópio", shape=component, fillcolor="#add8e6"];
-            
-            Source -> Mic [label="Som direto (t=0)", style=dashed];
-            Source -> Mic [label="Som pela mangueira (d=15m)", color="blue"];
-            Mic -> Osc [label="Sinal Elétrico"];
-        }
-        """)
+        st.markdown(f"![Esquema do procedimento I]({static_url('esquema_impulso.svg')})")
 
         st.markdown(r"""
         **Instruções:**
@@ -128,15 +363,15 @@ if procedure == "1. Método do Impulso/Eco":
         4. Meça a diferença de tempo $\Delta t$ entre os picos.
         """)
         
-        if 'animation_complete' not in st.session_state:
-            st.session_state.animation_complete = False
-            
         with st.container(border=True):
             st.subheader("🕹️ Realizar Experiência")
             st.write("Clique no botão abaixo para simular o choque entre os blocos:")
             
-            if st.button("🪵 Bater Blocos de Madeira", use_container_width=True):
-                st.session_state.animation_complete = False
+            if st.button("🪵 Bater Blocos de Madeira", width="stretch"):
+                # The result is known right away; the screen is revealed by a timer once the animation ends
+                st.session_state['measured_time_p1'] = float(engine.impulse_delay(temperature, timing_factor=engine.draw_timing_factor(rng=st.session_state.rng)))
+                st.session_state['p1_reveal_at'] = time.time() + ANIMATION_SECONDS
+                st.session_state['p1_revealed'] = False
                 st.session_state['triggered_p1'] = True
                 
                 # SVG Animation with Full-Screen Overlay style (using st.markdown to escape iframe limits)
@@ -152,11 +387,12 @@ justify-content: center;
 align-items: center;
 z-index: 10000;
 backdrop-filter: blur(8px);
-animation: fadeIn 0.4s ease-out forwards;
+animation: fadeIn 0.4s ease-out forwards, fadeOut 0.4s ease-in {ANIMATION_SECONDS}s forwards;
 font-family: sans-serif;
 ">
 <style>
 @keyframes fadeIn {{ from {{ opacity: 0; }} to {{ opacity: 1; }} }}
+@keyframes fadeOut {{ from {{ opacity: 1; }} to {{ opacity: 0; visibility: hidden; pointer-events: none; }} }}
 @keyframes clapLeft {{
     0% {{ transform: translateX(0); }}
     20% {{ transform: translateX(120px); }} /* exact fit: 300(center) - 120(start) - 80(width)*/
@@ -259,83 +495,104 @@ font-family: sans-serif;
 </div>"""
                 st.markdown(animation_html, unsafe_allow_html=True)
 
+    def impulse_screen():
+        # Runs as a fragment: polls on a timer (no server-side waiting) until the animation is over.
+        # A fragment-only rerun gets its own profile; inside a full rerun it joins the script's.
+        with profiling.rerun(session_tag, procedure):
+            impulse_screen_body()
 
-                
-                # Wait for animation to finish in Python (synchronization)
-                with st.spinner("Som a propagar-se..."):
-                    time.sleep(3.0) 
-                
-                st.session_state.animation_complete = True
-                st.session_state['measured_time_p1'] = (15.0 / v_theo) * np.random.normal(1.0, 0.005)
-                st.rerun()
+    def impulse_screen_body():
+        if not st.session_state['p1_revealed']:
+            if time.time() < st.session_state['p1_reveal_at']:
+                st.info("⏳ Som a propagar-se...")
+                return
+            st.session_state['p1_revealed'] = True
+            st.rerun()  # Full rerun: drops the overlay and the polling timer
 
-    
-    with col2:
-        if st.session_state.get('triggered_p1') and st.session_state.get('animation_complete'):
-            # Simulation parameters
-            total_time = 0.1  # 100 ms window
-            t = np.linspace(0, total_time, 2000)
-            
-            # Pulse 1 at t=0 (approx, slight delay for visibility)
-            t_pulse1 = 0.005
-            sig1 = generate_pulse(t, t_pulse1)
-            
-            # Pulse 2 at t = t_pulse1 + measured_time
-            dt = st.session_state['measured_time_p1']
-            t_pulse2 = t_pulse1 + dt
-            
-            # Attenuation for second pulse
-            sig2 = 0.6 * generate_pulse(t, t_pulse2) + 0.02 * np.random.normal(size=len(t)) # Add noise
-            sig1 += 0.02 * np.random.normal(size=len(t))
-            
-            st.subheader("Ecrã do Osciloscópio")
-            # Controls for Oscilloscope View
-            view_range_ms = st.slider("Base de Tempo (Janela de visualização em ms)", 10.0, 100.0, 60.0)
-            
-            fig = plot_oscilloscope(t, sig1, sig2, (0, view_range_ms/1000))
-            st.pyplot(fig)
-            
-            st.info(f"Dica: Cada divisão principal horizontal corresponde tipicamente a 1/10 da largura total, ou use a base de tempo.")
-            
-            st.markdown("---")
-            st.subheader("Verificação da Medição")
-            st.write(r"Meça a diferença de tempo $\Delta t$ entre o pico do sinal do emissor (verde) e o respetivo pico do sinal do recetor (amarelo) usando a grelha do ecrã do osciloscópio.")
-            user_dt = st.number_input(r"Introduza o valor de $\Delta t$ medido (em ms):", min_value=0.0, max_value=200.0, value=0.0, step=0.1)
-            
-            # Use the actual generated time from the simulation for validation
-            actual_dt_ms = st.session_state['measured_time_p1'] * 1000
-            
-            if st.button("Verificar Tempo"):
-                margin_of_error = 0.5 # Allow +/- 0.5 ms tolerance
+        st.subheader("Ecrã do Osciloscópio")
+        # Controls for Oscilloscope View
+        view_range_ms = st.slider("Base de Tempo (Janela de visualização em ms)", 10.0, 150.0, 60.0, step=1.0)
+        
+        measured_time = st.session_state['measured_time_p1']
+        frame_args = (sample_rate, impulse_model, temperature, noise_seed)
+        
+        if annotate_dt:
+            with profiling.section("delay_estimate"):
+                import analysis
+                # Cross-correlate a full-window record: the visible window may not contain the echo
+                t_full = engine.impulse_time_base()
+                est_dt = analysis.estimate_impulse_delay(t_full, *engine.synthesize_impulse(
+                    t_full, measured_time, rng=impulse_noise(t_full, measured_time, noise_seed),
+                    model=impulse_model, temperature=temperature))
+        
+        if browser_scope:
+            t, sig1, sig2 = synthesize_impulse_record(measured_time, view_range_ms, *frame_args)
+            plot_oscilloscope(t, sig1, sig2, (0, view_range_ms/1000))
+        else:
+            # Per-session frames in the shared cache, so the time base's neighbours can be prefetched
+            key, render = impulse_job(measured_time, view_range_ms, *frame_args)
+            png = (prefetcher or shared_cache()).get_or_render(key, lambda: render(get_oscilloscope()))
+            with profiling.section("scope_send"):
+                st.image(png, width="stretch")
+            if prefetcher:
+                prefetcher.submit(session_tag, [impulse_job(measured_time, view, *frame_args)
+                                                for view in prefetch.neighbours(view_range_ms, 1.0, 10.0, 150.0)])
+        if annotate_dt:
+            st.caption(rf"👩‍🏫 $\Delta t$ estimado por correlação cruzada CH1/CH2: **{est_dt * 1000:.2f} ms**")
+        
+        st.info(f"Dica: Cada divisão principal horizontal corresponde tipicamente a 1/10 da largura total, ou use a base de tempo.")
+        
+        st.markdown("---")
+        st.subheader("Verificação da Medição")
+        st.write(r"Meça a diferença de tempo $\Delta t$ entre o pico do sinal do emissor (verde) e o respetivo pico do sinal do recetor (amarelo) usando a grelha do ecrã do osciloscópio.")
+        user_dt = st.number_input(r"Introduza o valor de $\Delta t$ medido (em ms):", min_value=0.0, max_value=200.0, value=0.0, step=0.1)
+        
+        # Use the actual generated time from the simulation for validation (peak to peak, as the batch grader)
+        actual_dt_ms = float(grading.expected_dt_ms(st.session_state['measured_time_p1'], temperature, impulse_model))
+        
+        if st.button("Verificar Tempo"):
+            if user_dt > 0:
+                # The class results keep each student's latest reading of the impulse screen
+                reported = (engine.HOSE_LENGTH, user_dt / 1000)
+                previous = st.session_state.get('p1_reported')
+                if reported != previous:
+                    if previous:
+                        class_store().remove_point(session_tag, "impulse", *previous)
+                    class_store().add_point(session_tag, "impulse", *reported)
+                    st.session_state['p1_reported'] = reported
+            # Allow +/- grading.DT_TOLERANCE_MS tolerance
+            if grading.check_time(user_dt, actual_dt_ms):
+                st.success(f"Tempo Correto! O tempo de propagação aproximado é de **{actual_dt_ms:.1f} ms**.")
+            else:
+                st.error("Tempo Incorreto. Verifique a leitura na grelha do osciloscópio. Dica: conte o número de divisões entre os dois picos e multiplique pelo valor de cada divisão (Base de Tempo / 10).")
+
+        st.markdown("---")
+        st.write(r"Com base no tempo medido ($\Delta t$) e na distância percorrida pelo som ao longo da mangueira ($d = 15.0$ m), calcule a velocidade de propagação do som.")
+        user_v = st.number_input(r"Introduza o valor da velocidade calculada ($v$) em m/s:", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
+        
+        if st.button("Verificar Velocidade"):
+            # Avoid division by zero
+            if user_dt <= 0:
+                st.warning(r"Tem de ter um tempo $\Delta t$ válido (>0) na sua medição primeiro.")
+            else:
+                # Calculate what the student should have gotten based on THEIR input
+                expected_v_based_on_user_dt = float(grading.expected_speed(user_dt))
                 
-                if abs(user_dt - actual_dt_ms) <= margin_of_error:
-                    st.success(f"Tempo Correto! O tempo de propagação aproximado é de **{actual_dt_ms:.1f} ms**.")
+                # We accept a small margin of error (grading.V_TOLERANCE) to cover rounding differences in intermediate steps
+                if grading.check_speed(user_v, user_dt):
+                    st.success(f"Velocidade Correta! Com o tempo de {user_dt} ms, a velocidade é de aproximadamente **{expected_v_based_on_user_dt:.1f} m/s**.")
+                    
+                    # Show bonus feedback on how close they are to theoretical
+                    if grading.near_theory(user_v, v_theo):
+                         st.balloons()
+                         st.info(f"O seu valor experimental está muito próximo do valor teórico esperado para a temperatura atual ({v_theo:.1f} m/s)!")
                 else:
-                    st.error("Tempo Incorreto. Verifique a leitura na grelha do osciloscópio. Dica: conte o número de divisões entre os dois picos e multiplique pelo valor de cada divisão (Base de Tempo / 10).")
+                    st.error(f"Velocidade Incorreta. Reveja os seus cálculos. Lembre-se que $v = \\frac{{d}}{{\\Delta t}}$ e que o tempo tem de estar em segundos.")
 
-            st.markdown("---")
-            st.write(r"Com base no tempo medido ($\Delta t$) e na distância percorrida pelo som ao longo da mangueira ($d = 15.0$ m), calcule a velocidade de propagação do som.")
-            user_v = st.number_input(r"Introduza o valor da velocidade calculada ($v$) em m/s:", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
-            
-            if st.button("Verificar Velocidade"):
-                # Avoid division by zero
-                if user_dt <= 0:
-                    st.warning(r"Tem de ter um tempo $\Delta t$ válido (>0) na sua medição primeiro.")
-                else:
-                    # Calculate what the student should have gotten based on THEIR input
-                    expected_v_based_on_user_dt = 15.0 / (user_dt / 1000.0)
-                    
-                    # Round both to 2 decimal places to compare (this checks 2 significant figures precision loosely as requested, or rather 2 decimal precision)
-                    # We accept a small margin of error (e.g. 1.0 m/s) to cover rounding differences in intermediate steps
-                    if abs(user_v - expected_v_based_on_user_dt) <= 1.0:
-                        st.success(f"Velocidade Correta! Com o tempo de {user_dt} ms, a velocidade é de aproximadamente **{expected_v_based_on_user_dt:.1f} m/s**.")
-                        
-                        # Show bonus feedback on how close they are to theoretical
-                        if abs(user_v - v_theo) <= 10.0:
-                             st.balloons()
-                             st.info(f"O seu valor experimental está muito próximo do valor teórico esperado para a temperatura atual ({v_theo:.1f} m/s)!")
-                    else:
-                        st.error(f"Velocidade Incorreta. Reveja os seus cálculos. Lembre-se que $v = \\frac{{d}}{{\\Delta t}}$ e que o tempo tem de estar em segundos.")
+    with col2:
+        if st.session_state.get('triggered_p1'):
+            pending = not st.session_state['p1_revealed']
+            st.fragment(run_every=REVEAL_POLL_SECONDS if pending else None)(impulse_screen)()
 
 elif procedure == "2. Método do Desfasamento":
     st.header("Procedimento II: Método do Desfasamento")
@@ -351,21 +608,7 @@ elif procedure == "2. Método do Desfasamento":
         """)
         
         # Schematic for Procedure II
-        st.graphviz_chart("""
-        digraph G {
-            rankdir=LR;
-            node [shape=box, style=filled, fillcolor="#faebd7"];
-            Gen [label="Gerador de Sinais\nFrequency f", fillcolor="#90ee90"];
-            Speaker [label="Altifalante"];
-            Mic [label="Microfone Móvel"];
-            Osc [label="Osciloscópio", shape=component, fillcolor="#add8e6"];
-            
-            Gen -> Speaker [dir=both];
-            Gen -> Osc [label="CH1 (Ref)"];
-            Speaker -> Mic [label="Som (distância d)", style=dotted];
-            Mic -> Osc [label="CH2 (Sinal)", color="orange"];
-        }
-        """)
+        st.markdown(f"![Esquema do procedimento II]({static_url('esquema_desfasamento.svg')})")
         
         st.markdown("""
         **Instruções:**
@@ -378,7 +621,6 @@ elif procedure == "2. Método do Desfasamento":
         freq = st.slider("Frequência do Gerador (Hz)", 500, 3000, 1500, step=100)
         dist = st.slider("Distância Microfone-Altifalante (m)", 0.0, 1.5, 0.0, step=0.01)
         
-        wavelength = v_theo / freq
         # Theoretical Delay
         delay_theo = dist / v_theo
         
@@ -456,34 +698,103 @@ elif procedure == "2. Método do Desfasamento":
         st.components.v1.html(proc2_html, height=180)
         
         st.subheader("Ecrã do Osciloscópio")
+        xy_mode = st.radio("Modo do ecrã", ["YT (tempo)", "XY (Lissajous)"], horizontal=True,
+                           help="XY: CH1 no eixo horizontal e CH2 no vertical, como no osciloscópio real") != "YT (tempo)"
+        live_col1, live_col2 = st.columns(2)
+        with live_col1:
+            live = st.toggle("▶️ Aquisição contínua (RUN)")
+        with live_col2:
+            trigger = st.checkbox("Trigger: flanco ascendente do CH1", value=True, disabled=not live or xy_mode)
         
-        # Simulation
-        t_window = 5 / freq # Show 5 periods approx
-        if t_window < 0.002: t_window = 0.002
-        
-        t = np.linspace(0, t_window, 1000)
-        omega = 2 * np.pi * freq
-        
-        # Signal 1: Source
-        sig1 = np.sin(omega * t)
+        def live_screen():
+            # Timer-driven fragment: each frame only synthesizes the samples acquired since the last one
+            with profiling.rerun(session_tag, procedure):
+                scope = st.session_state.get('live_scope')
+                if scope is None:
+                    scope = st.session_state.live_scope = streaming.LiveScope(rng=st.session_state.rng)
+                with profiling.section("synthesis"):
+                    scope.configure(freq, dist, temperature)
+                    scope.advance()
+                t, sig1, sig2 = scope.frame(trigger)
+                if xy_mode:
+                    plot_lissajous(sig1, sig2, key="live_scope")
+                else:
+                    plot_oscilloscope(t, sig1, sig2, (0, scope.window), y_range=(-1.5, 1.5), key="live_scope")
+                show_measured_phase(sig1, sig2)
         
-        # Signal 2: Mic (Delayed by dist/v)
-        # Add noise
-        sig2 = 0.8 * np.sin(omega * (t - delay_theo)) + 0.05 * np.random.normal(size=len(t))
+        if live:
+            st.fragment(run_every=streaming.FRAME_SECONDS)(live_screen)()
+        else:
+            # The full record, not the decimated screen, is also what the phase is measured on
+            record = synthesize_phase_record(freq, dist, temperature, sample_rate)
+            if browser_scope and xy_mode:
+                plot_lissajous(record[1], record[2])
+            elif browser_scope:
+                with profiling.section("decimation"):
+                    t, sig1, sig2 = minmax_decimate(*record)
+                plot_oscilloscope(t, sig1, sig2, (0, t[-1]), y_range=(-1.5, 1.5))
+            else:
+                png = (prefetcher or shared_cache()).get_or_render(
+                    phase_png_key(freq, dist, temperature, sample_rate, xy_mode),
+                    lambda: render_phase_png(get_oscilloscope(), record, xy_mode))
+                with profiling.section("scope_send"):
+                    st.image(png, width="stretch")
+                if prefetcher:
+                    # One slider step away: the distance is dragged most, so its neighbours go first
+                    prefetcher.submit(session_tag,
+                        [phase_job(freq, d, temperature, sample_rate, xy_mode) for d in prefetch.neighbours(dist, 0.01, 0.0, 1.5)]
+                        + [phase_job(f, dist, temperature, sample_rate, xy_mode) for f in prefetch.neighbours(freq, 100, 500, 3000)])
         
-        fig = plot_oscilloscope(t, sig1, sig2, (0, t_window), y_range=(-1.5, 1.5))
-        st.pyplot(fig)
+        if annotate_dt:
+            if live:
+                record = synthesize_phase_record(freq, dist, temperature, sample_rate)
+            with profiling.section("delay_estimate"):
+                import analysis
+                # On the uniformly sampled record: min/max decimated screens would bias the correlation
+                est_delay = analysis.estimate_phase_delay(*record, freq)
+            st.caption(rf"👩‍🏫 Atraso medido por correlação cruzada (módulo do período): **{est_delay * 1000:.3f} ms**")
         
         st.metric("Atraso Calculado (Simulação)", f"{delay_theo*1000:.3f} ms")
-        st.markdown(rf"Desfasamento de fase: $\Delta \phi = {(dist/wavelength * 360) % 360:.1f}^\circ$")
+        if not live:
+            show_measured_phase(record[1], record[2])
+    
+    with st.expander("🗺️ Varrimento completo: frequência × distância"):
+        st.write("Simula e mede todas as combinações de frequência e distância dos controlos, mostrando o desfasamento, "
+                 "as posições em que os sinais ficam em fase e o comprimento de onda para cada frequência.")
+        if st.toggle("Calcular mapa de fase"):
+            # One broadcasted, chunked evaluation of the whole grid, cached per temperature
+            sweep_temperature = round(temperature, 1)
+            with st.spinner("A calcular..."), profiling.section("sweep"):
+                sweep_result = run_sweep(sweep_temperature)
+                st.image(plot_phase_map(sweep_temperature))
+            st.table([
+                {"Frequência (Hz)": f"{f:.0f}",
+                 "λ medido (m)": f"{lam:.4f}",
+                 "λ teórico (m)": f"{lam_theo:.4f}",
+                 "v = λ·f (m/s)": f"{v:.1f}",
+                 "Em fase em (m)": ", ".join(f"{x:.2f}" for x in d[:4]) + (" …" if len(d) > 4 else "")}
+                for f, lam, lam_theo, v, d in zip(sweep_result['freqs'], sweep_result['wavelength'], sweep_result['wavelength_theo'],
+                                                  sweep_result['speed'], sweep_result['coincidences'])
+            ])
 
 elif procedure == "3. Análise de Dados":
+    # No oscilloscope on this page: release the session's renderer
+    if 'oscilloscope' in st.session_state:
+        st.session_state.pop('oscilloscope').close()
+
     st.header("Registo e Análise de Dados")
     
     st.subheader("Tabela de Medições (Desfasamento)")
     
-    if 'df_p2' not in st.session_state:
-        st.session_state.df_p2 = pd.DataFrame(columns=["Distância (m)", "Tempo atraso (ms)"])
+    if 'p2_table' not in st.session_state:
+        st.session_state.p2_table = MeasurementTable()
+    table = st.session_state.p2_table
+    # Points entering or leaving this student's fit are queued for the class results
+    table.on_point = lambda op, point: class_store().record(session_tag, "phase", op, point[1], point[0])
+    
+    # Edits made in the data editor since the last rerun, against the frame it was given
+    with profiling.section("data_editor"):
+        table.apply_editor_state(st.session_state.get("data_editor_p2"))
     
     col_input1, col_input2, col_btn = st.columns(3)
     with col_input1:
@@ -494,40 +805,90 @@ elif procedure == "3. Análise de Dados":
         st.text("")
         st.text("")
         if st.button("Adicionar Ponto"):
-            new_row = pd.DataFrame({"Distância (m)": [d_in], "Tempo atraso (ms)": [t_in]})
-            st.session_state.df_p2 = pd.concat([st.session_state.df_p2, new_row], ignore_index=True)
+            with profiling.section("regression_fit"):
+                table.append(d_in, t_in)
     
-    # Use data_editor to allow adding/editing rows directly
-    edited_df = st.data_editor(st.session_state.df_p2, num_rows="dynamic", key="data_editor_p2")
+    # Use data_editor to allow adding/editing rows directly; the frame is only rebuilt when the rows change
+    with profiling.section("data_editor"):
+        if st.session_state.get('p2_frame', (None,))[0] != table.version:
+            st.session_state.p2_frame = (table.version, table.to_frame())
+        st.data_editor(st.session_state.p2_frame[1], num_rows="dynamic", key="data_editor_p2")
     
-    # Update session state with edits (optional, but good for persistence across reruns if needed)
-    st.session_state.df_p2 = edited_df
-    
-    if not edited_df.empty and len(edited_df) > 1:
-        # Linear Regression
-        # Ensure data is numeric
-        try:
-            X = edited_df["Tempo atraso (ms)"].astype(float) / 1000.0 
-            y = edited_df["Distância (m)"].astype(float)
-            
-            # Simple linear fit y = v * x + b
-            coef = np.polyfit(X, y, 1) # [slope, intercept]
-            v_exp_p2 = coef[0]
+    fit = table.fit
+    if len(table) > 1:
+        if not fit.ready:
+            st.warning("Insira dados numéricos válidos (pelo menos dois tempos diferentes) para calcular.")
+        else:
+            # Linear Regression d = v * t + b, maintained incrementally as rows change
+            v_exp_p2 = fit.slope
             
             st.markdown(f"**Declive da reta (Velocidade):** {v_exp_p2:.2f} m/s")
+            st.caption(f"Incerteza do declive: ± {fit.slope_stderr:.2f} m/s  ·  Ordenada na origem: {fit.intercept:.4f} m  ·  $R^2$ = {fit.r_squared:.4f}")
             
-            # Plot
-            fig_reg, ax_reg = plt.subplots(figsize=(6, 4))
-            ax_reg.scatter(X, y, color='red', label='Dados')
-            ax_reg.plot(X, coef[0]*X + coef[1], color='blue', label=f'Ajuste Linear ($v={v_exp_p2:.1f}$ m/s)')
-            ax_reg.set_xlabel("Tempo (s)")
-            ax_reg.set_ylabel("Distância (m)")
-            ax_reg.legend()
-            ax_reg.grid(True, linestyle='--', alpha=0.7)
-            st.pyplot(fig_reg)
+            # Plot: only re-rendered when the fitted points change
+            if st.session_state.get('p2_plot', (None,))[0] != table.fit_version:
+                with profiling.section("regression_plot"):
+                    st.session_state.p2_plot = (table.fit_version, plot_regression(*table.fitted_points(), fit))
+            with profiling.section("regression_send"):
+                st.image(st.session_state.p2_plot[1])
             
-            error_p2 = abs(v_exp_p2 - v_theo) / v_theo * 100
+            error_p2 = grading.percent_error(v_exp_p2, v_theo)
             st.info(f"Erro Percentual: **{error_p2:.2f}%**")
-        except Exception as e:
-            st.warning(f"Insira dados numéricos válidos para calcular. Erro: {e}")
+    
+    # Class-wide results and their reset are process-wide: teacher only
+    if teacher:
+        with st.expander("👩‍🏫 Resultados da turma"):
+            st.write("Medições de todos os alunos ligados a este servidor: reta de regressão da turma (método do desfasamento) "
+                     "e distribuição das velocidades obtidas por cada aluno.")
+            if st.toggle("Mostrar resultados da turma"):
+                with profiling.section("class_results"):
+                    store = class_store()
+                    store.flush()
+                    results = store.summary()
+                phase_results, impulse_results = results["phase"], results["impulse"]
+                class_col1, class_col2, class_col3 = st.columns(3)
+                class_col1.metric("Alunos (desfasamento)", phase_results["students"], f"{phase_results['points']} pontos",
+                                  delta_color="off")
+                class_col2.metric("Velocidade da turma (desfasamento)",
+                                  "-" if np.isnan(phase_results["speed"]) else f"{phase_results['speed']:.1f} m/s")
+                class_col3.metric("Velocidade média (impulso)",
+                                  "-" if np.isnan(impulse_results["speed"]) else f"{impulse_results['speed']:.1f} m/s",
+                                  f"{impulse_results['students']} alunos", delta_color="off")
+                if not np.isnan(phase_results["speed_stderr"]):
+                    st.caption(f"Incerteza do declive da turma: ± {phase_results['speed_stderr']:.2f} m/s  ·  "
+                               f"$R^2$ = {phase_results['r_squared']:.4f}")
+                speeds = np.concatenate([phase_results["speeds"], impulse_results["speeds"]])
+                if len(speeds):
+                    with profiling.section("class_results"):
+                        st.image(plot_histogram(speeds, v_theo, "Velocidade (m/s)", ylabel="Alunos"))
+                if st.button("Limpar resultados da turma"):
+                    store.reset(session_tag)
+                    store.flush()
+                    st.rerun()
+
+    with st.expander("👩‍🏫 Distribuição esperada dos resultados (Monte Carlo)"):
+        st.write("Simula muitas repetições de cada procedimento (ruído e incerteza temporal incluídos), medindo o atraso automaticamente, para mostrar a dispersão esperada dos resultados dos alunos.")
+        mc_col1, mc_col2 = st.columns(2)
+        with mc_col1:
+            mc_procedure = st.radio("Procedimento", ["impulse", "phase"],
+                format_func=lambda p: "I: Impulso (mangueira)" if p == "impulse" else "II: Desfasamento (série de distâncias)")
+        with mc_col2:
+            options = MC_TRIALS[impulse_model if mc_procedure == "impulse" else mc_procedure]
+            mc_trials = st.select_slider("Número de repetições", options, value=options[-2])
+        st.caption("Para mais repetições: `python montecarlo.py` na linha de comandos.")
+        if st.button("Simular"):
+            with st.spinner("A simular..."), profiling.section("monte_carlo"):
+                mc = run_monte_carlo(mc_procedure, temperature, mc_trials, impulse_model)
+            st.caption(f"{mc_trials:,d} ensaios em {mc['elapsed_s']:.2f} s ({mc['trials_per_s']:,.0f} ensaios/s)")
+            counts, edges = mc['v_hist']
+            st.image(plot_histogram(edges[:-1], mc['v_theo'], "Velocidade (m/s)", bins=edges, weights=counts))
+            st.table({name: {k: f"{v:.3f}" for k, v in stats.items()} for name, stats in mc['summary'].items()})
+
+if prefetcher:
+    prefetcher.foreground_finished()
+profile_record = profiling.end()
+if show_profile and profile_record:
+    show_profile_panel(profile_record)
 
+# Everything above has been sent: import the heavy modules in the background for the next reruns
+warmup.start()
@@ -0,0 +1,28 @@
+"""Shared helpers for the benchmark scripts (run them from the repo root)."""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def measure(fn, repeat=50, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+def report(name, samples, unit=1e3, suffix="ms"):
+    p50, p95 = np.percentile(samples, [50, 95]) * unit
+    print(f"{name:<48} p50 {p50:9.3f} {suffix}   p95 {p95:9.3f} {suffix}   (n={len(samples)})")
+    return p50
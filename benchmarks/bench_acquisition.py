@@ -0,0 +1,56 @@
+"""Real-scope acquisition: synthesis + decimation cost for long records.
+
+The 10 MS/s x 100 ms Procedure I record is the million-sample case. The
+frame budget is what a rerun can spend before the screen feels sluggish.
+Both hose models are timed: the lossy hose must fit the same budget as the
+pure delay.
+
+Usage: python benchmarks/bench_acquisition.py
+"""
+
+import numpy as np
+
+from _common import measure, report
+
+import engine
+from decimation import lttb, minmax_decimate
+
+FRAME_BUDGET_MS = 100
+
+
+def acquire_impulse(window, sample_rate, model="delay"):
+    t = engine.acquisition_time_base(window, sample_rate)
+    sig1, sig2 = engine.synthesize_impulse(t, 0.0437, model=model)
+    return t, sig1, sig2
+
+
+def main():
+    print(f"Procedure I acquisition + min/max decimation to screen width (budget {FRAME_BUDGET_MS} ms)")
+    for model in engine.IMPULSE_MODELS:
+        for sample_rate in engine.SAMPLE_RATES:
+            for window in (0.01, 0.1):
+                n = engine.record_length(window, sample_rate)
+                samples = measure(lambda: minmax_decimate(*acquire_impulse(window, sample_rate, model)), repeat=10, warmup=1)
+                p50 = report(f"{model:<5} {sample_rate / 1e6:g} MS/s x {window * 1e3:g} ms ({n:,d} samples)", samples)
+                if p50 > FRAME_BUDGET_MS:
+                    print("    ^ over frame budget")
+
+    t, sig1, sig2 = acquire_impulse(0.1, 10e6)
+    print(f"\nDecimation only, {len(t):,d} samples")
+    report("min/max, both channels", measure(lambda: minmax_decimate(t, sig1, sig2), repeat=20))
+    report("LTTB, one channel", measure(lambda: lttb(t, sig2, 1000), repeat=5, warmup=1))
+
+    # Peaks survive: the decimated maximum is exactly the record's maximum
+    _, d1, d2 = minmax_decimate(t, sig1, sig2)
+    assert d1.max() == sig1.max() and d2.max() == sig2.max()
+
+    window = float(engine.phase_window(500))
+    n = engine.record_length(window, 10e6)
+    rng = np.random.default_rng(0)
+    print(f"\nProcedure II at 500 Hz, 10 MS/s ({n:,d} samples)")
+    report("synthesis + min/max", measure(
+        lambda: minmax_decimate(*engine.synthesize_phase_shift(500, 0.3, 20.0, n=n, rng=rng)), repeat=10, warmup=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Server cost per oscilloscope update: PNG raster vs. browser canvas payload.
+
+Usage: python benchmarks/bench_canvas_payload.py
+"""
+
+from _common import measure, report
+
+import canvas_scope
+import engine
+from oscilloscope import OscilloscopeRenderer
+
+
+def main():
+    t = engine.impulse_time_base()
+    sig1, sig2 = engine.synthesize_impulse(t, 0.0437)
+    t_range, y_range = (0, 0.06), (-1, 1)
+    renderer = OscilloscopeRenderer()
+
+    png = renderer.render_png(t, sig1, sig2, t_range, y_range)
+    int16 = canvas_scope.encode_waveform(t, sig1, sig2, y_range)
+    float32 = canvas_scope.encode_waveform(t, sig1, sig2, y_range, dtype="float32")
+
+    print(f"Procedure I update ({len(t)} samples/channel)")
+    report("PNG render (persistent renderer)", measure(lambda: renderer.render_png(t, sig1, sig2, t_range, y_range), repeat=20))
+    report("canvas payload, int16", measure(lambda: canvas_scope.encode_waveform(t, sig1, sig2, y_range), repeat=200))
+    report("canvas payload, float32", measure(lambda: canvas_scope.encode_waveform(t, sig1, sig2, y_range, "float32"), repeat=200))
+    for name, size in (("PNG", len(png)),
+                       ("int16", len(int16["ch1"]) + len(int16["ch2"])),
+                       ("float32", len(float32["ch1"]) + len(float32["ch2"]))):
+        print(f"bytes per update, {name:<8} {size:>9,d}   ({len(png) / size:5.1f}x smaller than PNG)")
+    renderer.close()
+
+
+if __name__ == "__main__":
+    main()
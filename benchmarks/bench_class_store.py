@@ -0,0 +1,88 @@
+"""Class results store under load: many sessions writing while the teacher view reads.
+
+Each simulated session is a thread that enters points at a student's pace
+(with jitter), as reruns would; ``record`` is timed, since that is all a
+rerun ever waits for. Meanwhile a teacher thread refreshes the class
+summary. Also compares the incremental summary with rebuilding it from
+the whole table.
+
+Usage: python benchmarks/bench_class_store.py [sessions] [points per session]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from _common import report
+
+import engine
+from class_store import ClassStore, ClassSummary
+
+
+def student(store, session, points, rng, latencies):
+    speed = engine.speed_of_sound(20.0) * rng.normal(1, 0.02)
+    for i in range(points):
+        dist = 0.1 * (i + 1)
+        time.sleep(rng.uniform(0.0, 0.01))
+        start = time.perf_counter()
+        store.add_point(session, "phase", dist, dist / speed * rng.normal(1, 0.01))
+        latencies.append(time.perf_counter() - start)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sessions = int(argv[0]) if argv else 300
+    points = int(argv[1]) if len(argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ClassStore(os.path.join(tmp, "turma.db"))
+        latencies, refreshes = [], []
+        done = threading.Event()
+
+        def teacher():
+            while not done.is_set():
+                start = time.perf_counter()
+                store.summary()
+                refreshes.append(time.perf_counter() - start)
+                time.sleep(0.1)
+
+        threads = [threading.Thread(target=student, args=(store, f"s{i}", points, np.random.default_rng(i), latencies))
+                   for i in range(sessions)]
+        reader = threading.Thread(target=teacher)
+        start = time.perf_counter()
+        reader.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        store.flush()
+        elapsed = time.perf_counter() - start
+        done.set()
+        reader.join()
+
+        total = sessions * points
+        print(f"{sessions} sessions x {points} points = {total:,d} events in {elapsed:.2f} s "
+              f"({store.written / elapsed:,.0f} events/s written)")
+        report("record() as seen by a rerun", np.array(latencies), unit=1e6, suffix="us")
+        report("teacher summary refresh, during the load", np.array(refreshes))
+
+        summary = store.summary()["phase"]
+        print(f"class speed {summary['speed']:.2f} m/s from {summary['students']} students, {summary['points']:,d} points")
+
+        start = time.perf_counter()
+        store.summary()
+        incremental = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuilt = ClassSummary()
+        rebuilt.apply(store._connection().execute(
+            "SELECT seq, session, procedure, op, dist_m, delay_s FROM events ORDER BY seq").fetchall())
+        full = time.perf_counter() - start
+        print(f"summary with no new rows: {incremental * 1e3:.2f} ms; rebuilt from all {total:,d} rows: {full * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
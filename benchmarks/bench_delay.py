@@ -0,0 +1,72 @@
+"""Delay estimation: FFT cross-correlation vs. direct-method correlation.
+
+Usage: python benchmarks/bench_delay.py
+"""
+
+import time
+
+import numpy as np
+from scipy import signal
+
+from _common import measure, report
+
+import analysis
+import engine
+
+DIRECT_LIMIT = 100_000  # beyond this the O(N^2) direct method is extrapolated, not run
+
+
+def impulse_record(n, rng):
+    t = engine.impulse_time_base(n=n)
+    sig1, sig2 = engine.synthesize_impulse(t, 0.0437, rng=rng)
+    return t, sig1, sig2
+
+
+def direct_delay(t, sig1, sig2):
+    corr = signal.correlate(sig2 - sig2.mean(), sig1 - sig1.mean(), mode="full", method="direct")
+    return (corr.argmax() - (len(t) - 1)) * (t[1] - t[0])
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print("Single trace, impulse (true delay 43.700 ms)")
+    direct_per_n2 = None
+    for n in (2_000, 100_000, 1_000_000):
+        t, sig1, sig2 = impulse_record(n, rng)
+        fft = measure(lambda: analysis.estimate_impulse_delay(t, sig1, sig2), repeat=5, warmup=1)
+        report(f"FFT + parabolic, N={n:,d}", fft)
+        print(f"    estimate {analysis.estimate_impulse_delay(t, sig1, sig2) * 1e3:.3f} ms")
+        if n <= DIRECT_LIMIT:
+            direct = measure(lambda: direct_delay(t, sig1, sig2), repeat=3 if n > 10_000 else 20, warmup=0)
+            p50 = report(f"direct correlate, N={n:,d}", direct)
+            direct_per_n2 = p50 / n**2
+        else:
+            print(f"direct correlate, N={n:,d}   ~{direct_per_n2 * n**2 / 1e3:,.0f} s (extrapolated O(N^2), not run)")
+
+    print("\nBatched calls")
+    dt, t, sig1, sig2 = engine.simulate_impulse(20.0, trials=10_000, rng=rng)
+    start = time.perf_counter()
+    analysis.estimate_impulse_delay(t, sig1, sig2)
+    elapsed = time.perf_counter() - start
+    print(f"10,000 impulse traces x 2,000 samples: {elapsed:.2f} s ({10_000 / elapsed:,.0f} traces/s)")
+
+    freq = np.arange(500, 3001, 100)[:, np.newaxis]
+    dist = np.linspace(0, 1.5, 151)
+    t, sig1, sig2 = engine.synthesize_phase_shift(freq, dist, 20.0, rng=rng)
+    start = time.perf_counter()
+    analysis.estimate_phase_delay(t, sig1, sig2, freq)
+    elapsed = time.perf_counter() - start
+    print(f"{sig1.shape[0] * sig1.shape[1]:,d} phase-shift traces (26 frequencies): {elapsed:.2f} s")
+
+    dist = np.linspace(0, 1.5, 385)  # 26 x 385 = 10,010 traces
+    t, sig1, sig2 = engine.synthesize_phase_shift(freq, dist, 20.0, rng=rng)
+    start = time.perf_counter()
+    phase = analysis.hilbert_phase(sig1, sig2)
+    elapsed = time.perf_counter() - start
+    error = (phase - engine.phase_difference_deg(freq, dist, 20.0) + 180) % 360 - 180
+    print(f"{sig1.shape[0] * sig1.shape[1]:,d} phase-shift traces, Hilbert phase in one call: {elapsed:.2f} s "
+          f"(max error {np.abs(error).max():.2f} deg)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Load test: N students clicking "Bater Blocos de Madeira" at the same time.
+
+Each simulated session is a headless AppTest driven from its own thread. The
+click rerun no longer waits for the animation, so the whole batch should
+finish in a small fraction of the old 3 s-per-click sleep.
+
+Usage: python benchmarks/bench_impulse_clicks.py [N ...]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _common import ROOT
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(ROOT, "app.py")
+LEGACY_SLEEP = 3.0
+
+
+def open_session():
+    return AppTest.from_file(APP, default_timeout=120).run()
+
+
+def click_blocks(at):
+    start = time.perf_counter()
+    at.button[0].click().run()
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return time.perf_counter() - start
+
+
+def run(n):
+    sessions = [open_session() for _ in range(n)]
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(click_blocks, sessions))
+        wall = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    print(f"N={n:<4} wall {wall:7.2f} s   throughput {n / wall:8.1f} clicks/s   "
+          f"click p50 {p50 * 1e3:7.1f} ms   max {latencies[-1] * 1e3:7.1f} ms   "
+          f"(old sleep alone: >= {LEGACY_SLEEP:.0f} s per click)")
+
+
+def main():
+    for n in [int(a) for a in sys.argv[1:]] or [1, 10, 30]:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Live (RUN) mode of Procedure II: server cost of one frame per student.
+
+Compares a ring-buffer frame (new samples only, read out at the trigger)
+with redrawing the snapshot from scratch, both sent as the canvas payload,
+and the frame rate one core can sustain for a class.
+
+Usage: python benchmarks/bench_live.py [students]
+"""
+
+import sys
+
+import numpy as np
+
+from _common import measure, report
+
+import canvas_scope
+import engine
+import streaming
+from decimation import minmax_decimate
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    scopes = []
+    for i in range(students):
+        scope = streaming.LiveScope(rng=np.random.default_rng(i))
+        scope.configure(1500, 0.01 * i, 20.0)
+        scope.advance(0.0)
+        scopes.append(scope)
+    clock = [0.0]
+
+    def live_frames():
+        clock[0] += streaming.FRAME_SECONDS
+        for scope in scopes:
+            scope.advance(clock[0])
+            t, ch1, ch2 = scope.frame(trigger=True)
+            canvas_scope.encode_waveform(t, ch1, ch2, (-1.5, 1.5))
+
+    rng = np.random.default_rng(0)
+
+    def snapshot_frames():
+        for i in range(students):
+            t, ch1, ch2 = minmax_decimate(*engine.synthesize_phase_shift(1500, 0.01 * i, 20.0, rng=rng))
+            canvas_scope.encode_waveform(t, ch1, ch2, (-1.5, 1.5))
+
+    print(f"{students} students, one frame each (canvas payload included)")
+    for name, fn in (("ring buffer (live)", live_frames), ("full redraw (snapshot)", snapshot_frames)):
+        p50 = report(name, measure(fn, repeat=50))
+        fps = 1000 / p50 if p50 else float("inf")
+        print(f"    -> {fps:,.0f} class frames/s on one core "
+              f"(target {1 / streaming.FRAME_SECONDS:g}/s per student)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Screen-trace noise: a fresh Generator draw per rerun vs. slices of the shared noise bank.
+
+Also checks that a frame's noise is reproducible: the same seed gives the
+same trace.
+
+Usage: python benchmarks/bench_noise.py
+"""
+
+import time
+
+import numpy as np
+
+from _common import measure, report
+
+import engine
+import noise_bank
+
+SIZES = (1_000, 100_001, 1_000_001)  # Procedure II screen, 10 MS/s x 10 ms, 10 MS/s x 100 ms
+
+
+def main():
+    start = time.perf_counter()
+    noise_bank.bank()
+    print(f"noise bank: {noise_bank.BANK_SIZE:,d} samples ({noise_bank.bank().nbytes / 1e6:.0f} MB), "
+          f"drawn once per process in {(time.perf_counter() - start) * 1e3:.1f} ms\n")
+
+    print("Noise for both channels of one trace")
+    for n in SIZES:
+        def generator(n=n):
+            rng = np.random.default_rng(12345)
+            return rng.standard_normal(n), rng.standard_normal(n)
+
+        def banked(n=n):
+            noise = noise_bank.BankedNoise(12345)
+            return noise.standard_normal(n), noise.standard_normal(n)
+
+        report(f"Generator draw, N={n:,d}", measure(generator, repeat=20))
+        report(f"bank slices, N={n:,d}", measure(banked, repeat=20), unit=1e6, suffix="us")
+
+    print("\nFull synthesis of one frame")
+    t = engine.acquisition_time_base(0.1, 10e6)
+    report("impulse 10 MS/s x 100 ms, Generator",
+           measure(lambda: engine.synthesize_impulse(t, 0.0437, rng=np.random.default_rng(1)), repeat=10))
+    report("impulse 10 MS/s x 100 ms, noise bank",
+           measure(lambda: engine.synthesize_impulse(t, 0.0437, rng=noise_bank.BankedNoise(1)), repeat=10))
+
+    a = engine.synthesize_phase_shift(1500, 0.37, 20.0, rng=noise_bank.BankedNoise(7))
+    b = engine.synthesize_phase_shift(1500, 0.37, 20.0, rng=noise_bank.BankedNoise(7))
+    print(f"\nsame seed, same trace: {np.array_equal(a[2], b[2])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Per-frame oscilloscope render time: new pyplot figure per rerun vs. the persistent renderer.
+
+Usage: python benchmarks/bench_oscilloscope.py
+"""
+
+import io
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+plt.rcParams["figure.max_open_warning"] = 0
+
+from _common import measure, report
+
+import engine
+from oscilloscope import OscilloscopeRenderer
+
+DPI = 150  # both paths render the same pixels, so only the per-frame work differs
+
+
+def legacy_frame(t, ch1, ch2, t_range, y_range):
+    # What every rerun used to do: plt.subplots + full styling + st.pyplot's savefig (never closed)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.set_facecolor("#1e1e1e")
+    ax.grid(color="#444", linestyle='--', linewidth=0.5)
+    ax.plot(t * 1000, ch1, color="#00ff00", linewidth=1.5, label="CH1 (Fonte/Gerador)")
+    ax.plot(t * 1000, ch2, color="#ffff00", linewidth=1.5, label="CH2 (Recetor/Microfone)")
+    ax.set_xlabel("Tempo (ms)", fontsize=12)
+    ax.set_ylabel("Tensão (V)", fontsize=12)
+    ax.set_xlim(t_range[0] * 1000, t_range[1] * 1000)
+    ax.set_ylim(y_range)
+    ax.minorticks_on()
+    ax.grid(which='major', color='#888888', linestyle='-', linewidth=1.0)
+    ax.grid(which='minor', color='#444444', linestyle=':', linewidth=0.6)
+    ax.legend(loc='upper right', facecolor='#333', edgecolor='white', labelcolor='white')
+    plt.tight_layout()
+    fig.savefig(io.BytesIO(), bbox_inches="tight", dpi=DPI, format="png")
+
+
+def main():
+    # Procedure II slider drag: the distance changes, the time base stays put
+    frames = [engine.synthesize_phase_shift(1500, d, 20.0) for d in (0.0, 0.01, 0.02, 0.03, 0.04)]
+    t_range = (0, frames[0][0][-1])
+    y_range = (-1.5, 1.5)
+    it = iter(range(10**9))
+
+    def next_frame():
+        return frames[next(it) % len(frames)]
+
+    tracemalloc.start()
+    legacy = measure(lambda: legacy_frame(*next_frame(), t_range, y_range), repeat=20)
+    legacy_mem = tracemalloc.get_traced_memory()[0]
+    open_figs = len(plt.get_fignums())
+    plt.close("all")
+    tracemalloc.stop()
+
+    renderer = OscilloscopeRenderer(dpi=DPI)
+    tracemalloc.start()
+    fast = measure(lambda: renderer.render_png(*next_frame(), t_range, y_range), repeat=100)
+    fast_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Time-base change (e.g. frequency slider): background is rebuilt once
+    scales = iter(range(10**9))
+
+    def rescale():
+        t, ch1, ch2 = next_frame()
+        renderer.update(t, ch1, ch2, (0, t_range[1] * (1 + next(scales) % 2)), y_range)
+        renderer.render_png()
+
+    rescaled = measure(rescale, repeat=20)
+
+    # XY (Lissajous) screen on the same renderer: steady frames, then alternating with YT
+    xy = measure(lambda: renderer.render_xy_png(*next_frame()[1:], y_range, y_range), repeat=100)
+    modes = iter(range(10**9))
+
+    def switch():
+        t, ch1, ch2 = next_frame()
+        if next(modes) % 2:
+            renderer.render_xy_png(ch1, ch2, y_range, y_range)
+        else:
+            renderer.render_png(t, ch1, ch2, t_range, y_range)
+
+    switched = measure(switch, repeat=20)
+    renderer.close()
+
+    print(f"Oscilloscope frame render (Procedure II, 1000 samples/channel, {DPI} dpi)")
+    before = report("before: plt.subplots + savefig per rerun", legacy)
+    after = report("after: persistent renderer, same limits", fast)
+    report("after: persistent renderer, limits changed", rescaled)
+    report("XY screen, same renderer", xy)
+    report("XY <-> YT every frame", switched)
+    print(f"speed-up (same limits): {before / after:.1f}x")
+    print(f"retained memory: before {legacy_mem / 1e6:.1f} MB in {open_figs} open pyplot figures, "
+          f"after {fast_mem / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
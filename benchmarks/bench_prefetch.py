@@ -0,0 +1,87 @@
+"""Slider drags with and without background prefetch of the neighbouring frames.
+
+Each simulated session drags the Procedure II distance slider one step at a
+time, with a pause between steps as a student's drag produces. A step is
+a "rerun": mark the foreground, get the frame from the render cache
+(rendering it on a miss), queue the neighbours, unmark. Reported: rerun
+latency, cache hit rate and what the prefetcher did, for one session
+and for several at once (where the per-process limits kick in).
+
+Usage: python benchmarks/bench_prefetch.py [sessions under load]
+"""
+
+import sys
+import threading
+import time
+
+import numpy as np
+
+from _common import report
+
+import engine
+import noise_bank
+import prefetch
+from decimation import minmax_decimate
+from oscilloscope import OscilloscopeRenderer
+from render_cache import RenderCache, frame_seed, phase_frame_key
+
+STEPS = 40
+THINK = 0.15  # s between drag steps
+
+
+def render_frame(freq, dist, renderer):
+    rng = noise_bank.BankedNoise(frame_seed(phase_frame_key(freq, dist, 20.0)))
+    t, ch1, ch2 = minmax_decimate(*engine.synthesize_phase_shift(freq, dist, 20.0, rng=rng))
+    return renderer.render_png(t, ch1, ch2, (0, t[-1]), (-1.5, 1.5))
+
+
+def job(freq, dist):
+    return phase_frame_key(freq, dist, 20.0), lambda renderer: render_frame(freq, dist, renderer)
+
+
+def drag(session, freq, cache, prefetcher, latencies):
+    renderer = OscilloscopeRenderer()
+    for step in range(STEPS):
+        dist = round(0.01 * step, 2)
+        start = time.perf_counter()
+        if prefetcher:
+            prefetcher.foreground_started()
+        key, render = job(freq, dist)
+        (prefetcher or cache).get_or_render(key, lambda: render(renderer))
+        if prefetcher:
+            prefetcher.submit(session, [job(freq, d) for d in prefetch.neighbours(dist, 0.01, 0.0, 1.5)])
+            prefetcher.foreground_finished()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(THINK)
+    renderer.close()
+
+
+def run(sessions, use_prefetch):
+    cache = RenderCache()
+    prefetcher = prefetch.Prefetcher(cache) if use_prefetch else None
+    latencies = []
+    threads = [threading.Thread(target=drag, args=(f"s{i}", 500 + 100 * i, cache, prefetcher, latencies))
+               for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if prefetcher:
+        prefetcher.shutdown()
+    return np.array(latencies), cache.stats(), prefetcher.stats if prefetcher else None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    loaded = int(argv[0]) if argv else 8
+    for sessions in (1, loaded):
+        print(f"{sessions} session(s) dragging the distance slider, {STEPS} steps each")
+        for use_prefetch in (False, True):
+            latencies, stats, done = run(sessions, use_prefetch)
+            name = "with prefetch" if use_prefetch else "no prefetch"
+            report(f"  {name}: rerun", latencies)
+            print(f"    cache hit rate {stats['hit_rate']:.0%}" + (f", prefetcher {done}" if done else ""))
+
+
+if __name__ == "__main__":
+    main()
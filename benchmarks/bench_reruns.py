@@ -0,0 +1,194 @@
+"""Rerun latency of scripted classroom interactions, driven headlessly by AppTest.
+
+Each scenario runs in a fresh interpreter: the app is opened on the
+relevant page, then a sequence of interactions (one rerun each) is timed.
+Reported per scenario: p50/p95 rerun latency, peak RSS and RSS growth
+during the interactions.
+
+Results can be saved as a baseline; later runs compare against it and
+exit with status 1 when a scenario's p95 latency or peak memory grew by
+more than the tolerance.
+
+Usage:
+    python benchmarks/bench_reruns.py                    # all scenarios, compare with the baseline
+    python benchmarks/bench_reruns.py p2_freq rows_100   # some scenarios
+    python benchmarks/bench_reruns.py --save-baseline
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from _common import ROOT
+
+P1, P2, P3 = "1. Método do Impulso/Eco", "2. Método do Desfasamento", "3. Análise de Dados"
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline_reruns.json")
+ROW_COUNTS = (10, 100, 1000)
+MIN_REGRESSION_MS = 5.0  # ignore p95 changes smaller than this (timer noise on fast reruns)
+MIN_REGRESSION_MB = 10.0
+
+
+def _by_label(widgets, prefix):
+    return next(w for w in widgets if w.label.startswith(prefix))
+
+
+def _page(at, procedure):
+    at.sidebar.radio[0].set_value(procedure).run()
+
+
+def _reveal_impulse(at):
+    # Skip the wood-block animation; the fragment timer would reveal the screen anyway
+    at.button[0].click().run()
+    at.session_state["p1_reveal_at"] = 0
+    at.run()
+
+
+def temperature(at):
+    _reveal_impulse(at)
+    for value in np.round(np.linspace(-20, 40, 31), 1):
+        yield lambda value=value: at.sidebar.number_input[0].set_value(float(value)).run()
+
+
+def blocks(at):
+    for _ in range(30):
+        yield lambda: at.button[0].click().run()
+
+
+def view_range(at):
+    _reveal_impulse(at)
+    for value in np.linspace(10, 100, 31):
+        yield lambda value=value: _by_label(at.slider, "Base de Tempo").set_value(float(value)).run()
+
+
+def p2_freq(at):
+    _page(at, P2)
+    for value in range(500, 3001, 100):
+        yield lambda value=value: _by_label(at.slider, "Frequência").set_value(value).run()
+
+
+def p2_dist(at):
+    _page(at, P2)
+    for value in np.round(np.arange(0, 1.501, 0.05), 2):
+        yield lambda value=value: _by_label(at.slider, "Distância").set_value(float(value)).run()
+
+
+def rows(count):
+    def scenario(at):
+        _page(at, P3)
+        for i in range(count):
+            def add(i=i):
+                at.number_input(key="d_in").set_value(0.01 * (i + 1))
+                at.number_input(key="t_in").set_value(0.029 * (i + 1))
+                _by_label(at.button, "Adicionar Ponto").click().run()
+            yield add
+    return scenario
+
+
+SCENARIOS = {
+    "temperature": temperature,
+    "blocks": blocks,
+    "view_range": view_range,
+    "p2_freq": p2_freq,
+    "p2_dist": p2_dist,
+    **{f"rows_{n}": rows(n) for n in ROW_COUNTS},
+}
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10  # bytes on macOS, KiB elsewhere
+
+
+def child(name):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.run()
+    steps = SCENARIOS[name](at)
+    first = next(steps)  # runs the scenario's setup, so it is left out of the RSS growth
+    rss_before = _max_rss_mb()
+    latencies = []
+    for step in itertools.chain([first], steps):
+        start = time.perf_counter()
+        step()
+        latencies.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception}")
+    print(json.dumps({"latencies": latencies, "rss_before_mb": rss_before, "rss_peak_mb": _max_rss_mb()}))
+
+
+def measure(name):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Imports happen during setup, not mid-scenario; the fake points go to a throwaway class database
+        env = dict(os.environ, SIMULADOR_WARMUP="0", SIMULADOR_CLASS_DB=os.path.join(tmp, "turma.db"))
+        out = subprocess.run([sys.executable, __file__, "--child", name],
+                             capture_output=True, text=True, env=env, check=True).stdout
+    raw = json.loads(out.strip().splitlines()[-1])
+    p50, p95 = np.percentile(raw["latencies"], [50, 95]) * 1e3
+    return {"reruns": len(raw["latencies"]), "p50_ms": float(p50), "p95_ms": float(p95),
+            "peak_rss_mb": raw["rss_peak_mb"], "rss_growth_mb": raw["rss_peak_mb"] - raw["rss_before_mb"]}
+
+
+def regressions(result, base, tolerance):
+    flags = []
+    if result["p95_ms"] > base["p95_ms"] * (1 + tolerance) and result["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS:
+        flags.append(f"p95 {base['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+    if (result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance)
+            and result["peak_rss_mb"] - base["peak_rss_mb"] > MIN_REGRESSION_MB):
+        flags.append(f"RSS {base['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB")
+    return flags
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"cenários a correr (por omissão todos): {', '.join(SCENARIOS)}")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="aumento relativo tolerado (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["scenarios"]
+
+    results, flagged = {}, 0
+    print(f"{'scenario':<14} {'reruns':>6} {'p50':>10} {'p95':>10} {'peak RSS':>10} {'growth':>9}")
+    for name in args.scenarios or SCENARIOS:
+        r = results[name] = measure(name)
+        flags = regressions(r, baseline[name], args.tolerance) if name in baseline else []
+        flagged += bool(flags)
+        print(f"{name:<14} {r['reruns']:6d} {r['p50_ms']:7.1f} ms {r['p95_ms']:7.1f} ms "
+              f"{r['peak_rss_mb']:7.0f} MB {r['rss_growth_mb']:6.0f} MB"
+              + (f"  REGRESSÃO: {'; '.join(flags)}" if flags else ""))
+
+    if args.save_baseline:
+        merged = dict(baseline, **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "platform": sys.platform, "scenarios": merged}, f, indent=2)
+        print(f"baseline -> {os.path.relpath(args.baseline, ROOT)}")
+    elif not baseline:
+        print("sem baseline; corre com --save-baseline para a criar")
+    return 1 if flagged and not args.save_baseline else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        sys.exit(main())
@@ -0,0 +1,78 @@
+"""Cold-start budget: import time and time to first render of each procedure.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in
+sys.modules. "cold" disables the background warm-up; "warm" lets it run
+for a few seconds after the first page, as a student reading the
+instructions would.
+
+Usage: python benchmarks/bench_startup.py [repeats]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from _common import ROOT
+
+PROCEDURES = ["1. Método do Impulso/Eco", "2. Método do Desfasamento", "3. Análise de Dados"]
+WARM_WAIT = 5.0
+
+
+def child(procedure, warm):
+    timings = {}
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    timings["import_streamlit"] = time.perf_counter() - start
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    timings["first_page"] = time.perf_counter() - start
+
+    if procedure != PROCEDURES[0]:
+        if warm:
+            time.sleep(WARM_WAIT)
+        start = time.perf_counter()
+        at.sidebar.radio[0].set_value(procedure).run()
+        timings["procedure_page"] = time.perf_counter() - start
+    else:
+        # Procedure I shows its screen after clicking the blocks and the timed reveal
+        if warm:
+            time.sleep(WARM_WAIT)
+        start = time.perf_counter()
+        at.button[0].click().run()
+        at.session_state["p1_reveal_at"] = 0
+        at.run()
+        timings["procedure_page"] = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception)
+    timings["modules"] = sorted(m for m in ("matplotlib.figure", "scipy.signal", "pandas") if m in sys.modules)
+    print(json.dumps(timings))
+
+
+def measure(procedure, warm):
+    env = dict(os.environ, SIMULADOR_WARMUP="1" if warm else "0")
+    out = subprocess.run([sys.executable, __file__, "--child", procedure, str(int(warm))],
+                         capture_output=True, text=True, env=env, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    print(f"{'procedure':<28} {'mode':<5} {'import st':>10} {'1st page':>10} {'procedure':>10}  heavy modules loaded")
+    for procedure in PROCEDURES:
+        for warm in (False, True):
+            runs = [measure(procedure, warm) for _ in range(repeats)]
+            best = {k: min(r[k] for r in runs) for k in ("import_streamlit", "first_page", "procedure_page")}
+            print(f"{procedure:<28} {'warm' if warm else 'cold':<5} "
+                  f"{best['import_streamlit'] * 1e3:8.0f} ms {best['first_page'] * 1e3:8.0f} ms "
+                  f"{best['procedure_page'] * 1e3:8.0f} ms  {', '.join(runs[-1]['modules']) or '-'}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3] == "1")
+    else:
+        main()
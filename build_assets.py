@@ -0,0 +1,31 @@
+"""Pre-render the Graphviz schematics in ``schematics/`` to ``static/``.
+
+The app shows the SVGs through Streamlit's static file serving
+(``app/static/...``, content-hashed URLs), so it never sends DOT
+sources for the browser to lay out and works without network access.
+Run this after editing a ``.dot`` file; it needs Graphviz's ``dot``.
+
+    python build_assets.py
+"""
+
+import pathlib
+import shutil
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent
+SOURCES = ROOT / "schematics"
+OUTPUT = ROOT / "static"
+
+
+def build(dot="dot"):
+    if shutil.which(dot) is None:
+        sys.exit("Graphviz 'dot' não encontrado; instala o Graphviz para regenerar os esquemas.")
+    for source in sorted(SOURCES.glob("*.dot")):
+        target = OUTPUT / f"esquema_{source.stem}.svg"
+        subprocess.run([dot, "-Tsvg", str(source), "-o", str(target)], check=True)
+        print(f"{source.relative_to(ROOT)} -> {target.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,65 @@
+"""Browser-side oscilloscope screen.
+
+Instead of shipping a matplotlib raster on every rerun, the server sends the
+two channels as compact binary buffers (int16-quantized by default, or
+float32) plus the time base; ``scope_frontend/index.html`` draws the grid,
+labels and traces on a canvas, either against time or, in XY mode, CH2
+against CH1 from the same buffers. When the frontend is unavailable the caller
+falls back to the matplotlib renderer.
+"""
+
+import os
+
+import numpy as np
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scope_frontend")
+INT16_MAX = 32767
+HEADROOM = 1.25  # keep noise that pokes outside the screen from clipping
+
+_component = None
+
+
+def available():
+    return os.path.exists(os.path.join(FRONTEND_DIR, "index.html"))
+
+
+def encode_waveform(time, ch1, ch2, y_range=(-1, 1), dtype="int16"):
+    """Pack a uniformly sampled pair of traces into the component payload."""
+    time = np.asarray(time, dtype=float)
+    payload = {
+        "t0": float(time[0]),
+        "dt": float(time[1] - time[0]) if len(time) > 1 else 0.0,
+        "dtype": dtype,
+    }
+    if dtype == "float32":
+        payload["scale"] = 1.0
+        payload["ch1"] = np.asarray(ch1, dtype="<f4").tobytes()
+        payload["ch2"] = np.asarray(ch2, dtype="<f4").tobytes()
+        return payload
+
+    scale = HEADROOM * max(abs(y_range[0]), abs(y_range[1])) / INT16_MAX
+    payload["scale"] = scale
+    for name, ch in (("ch1", ch1), ("ch2", ch2)):
+        q = np.clip(np.rint(np.asarray(ch) / scale), -INT16_MAX, INT16_MAX)
+        payload[name] = q.astype("<i2").tobytes()
+    return payload
+
+
+def _get_component():
+    global _component
+    if _component is None:
+        import streamlit.components.v1 as components
+        _component = components.declare_component("oscilloscope_canvas", path=FRONTEND_DIR)
+    return _component
+
+
+def show(time, ch1, ch2, t_range, y_range=(-1, 1), dtype="int16", key=None):
+    payload = encode_waveform(time, ch1, ch2, y_range, dtype)
+    return _get_component()(t_range=list(t_range), y_range=list(y_range), key=key, default=None, **payload)
+
+
+def show_xy(ch1, ch2, x_range=(-1, 1), y_range=(-1, 1), dtype="int16", key=None):
+    # Both channels share one quantization scale, so it must cover both ranges
+    v_max = max(abs(x_range[0]), abs(x_range[1]), abs(y_range[0]), abs(y_range[1]))
+    payload = encode_waveform(np.zeros(1), ch1, ch2, (-v_max, v_max), dtype)
+    return _get_component()(mode="xy", x_range=list(x_range), y_range=list(y_range), key=key, default=None, **payload)
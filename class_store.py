@@ -0,0 +1,210 @@
+"""Results of the whole class, shared by every session (teacher view).
+
+Each measurement a student enters is stored in a local SQLite database in
+WAL mode as an event: a point entering or leaving that student's data (an
+edit is a removal plus an addition), or a reset of the class results.
+Reruns never wait on the database: ``record`` only queues the event, and
+one writer thread per process inserts the queue in batches, one
+transaction per batch. Readers use one connection per thread and, in WAL
+mode, are never blocked by the writer.
+
+``ClassSummary`` follows the event log from the last sequence number it
+has applied, so the class-wide regression (a ``RunningFit``) and each
+student's speed are updated with the new events only -- including events
+written by other server processes -- instead of rescanning the table.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from regression import RunningFit
+
+PROCEDURES = ("impulse", "phase")
+ADD, REMOVE, RESET = 1, -1, 0
+FLUSH_INTERVAL = 0.25  # s, longest an event waits in the queue
+BATCH_SIZE = 500       # events that trigger an early flush
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados_turma.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    session TEXT NOT NULL,
+    procedure TEXT NOT NULL,
+    op INTEGER NOT NULL,
+    dist_m REAL,
+    delay_s REAL
+)
+"""
+
+
+def _connect(path):
+    # Autocommit mode: batches open their own transaction
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last batches can be lost on power failure
+    return conn
+
+
+def _speed(procedure, fit):
+    # Phase method: slope of distance vs delay. Impulse: every point is at the hose length, so mean d / mean t
+    if procedure == "phase":
+        return fit.slope
+    return fit.mean_y / fit.mean_x if fit.n and fit.mean_x > 0 else math.nan
+
+
+class ClassSummary:
+    def __init__(self):
+        self.seq = 0
+        self.reset()
+
+    def reset(self):
+        self.fits = {p: RunningFit() for p in PROCEDURES}                 # all students' points
+        self.students = {p: defaultdict(RunningFit) for p in PROCEDURES}  # session -> its own points
+        self.points = {p: defaultdict(Counter) for p in PROCEDURES}       # session -> (dist, delay) multiset
+
+    def apply(self, rows):
+        """Apply ``(seq, session, procedure, op, dist_m, delay_s)`` rows, in ``seq`` order."""
+        for seq, session, procedure, op, dist, delay in rows:
+            self.seq = seq
+            if op == RESET:
+                self.reset()
+                continue
+            if procedure not in self.fits:
+                continue
+            if op == REMOVE and not self.points[procedure].get(session, {}).get((dist, delay)):
+                continue  # a point from before the last reset
+            points = self.points[procedure][session]
+            student = self.students[procedure][session]
+            if op == ADD:
+                points[dist, delay] += 1
+                self.fits[procedure].add(delay, dist)
+                student.add(delay, dist)
+            else:
+                points[dist, delay] -= 1
+                self.fits[procedure].remove(delay, dist)
+                student.remove(delay, dist)
+                if student.n == 0:
+                    del self.students[procedure][session]
+                    del self.points[procedure][session]
+
+    def speeds(self, procedure):
+        values = (_speed(procedure, fit) for fit in self.students[procedure].values())
+        return np.array([v for v in values if math.isfinite(v)])
+
+    def snapshot(self):
+        out = {"seq": self.seq}
+        for procedure in PROCEDURES:
+            fit = self.fits[procedure]
+            out[procedure] = {
+                "students": len(self.students[procedure]),
+                "points": fit.n,
+                "speed": _speed(procedure, fit),
+                "speed_stderr": fit.slope_stderr if procedure == "phase" else math.nan,
+                "r_squared": fit.r_squared if procedure == "phase" else math.nan,
+                "speeds": self.speeds(procedure),
+            }
+        return out
+
+
+class ClassStore:
+    def __init__(self, path=DEFAULT_PATH, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        conn = _connect(path)
+        conn.execute(SCHEMA)
+        conn.close()
+        self._pending = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._local = threading.local()
+        self._summary = ClassSummary()
+        self._summary_lock = threading.Lock()
+        self.written = 0  # events inserted by this process
+
+    # --- Writes: queued, inserted in batches by one thread ---
+
+    def record(self, session, procedure, op, dist=None, delay_s=None):
+        with self._cond:
+            self._pending.append((time.time(), session, procedure, op, dist, delay_s))
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="class-store-writer", daemon=True)
+                self._writer.start()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def add_point(self, session, procedure, dist, delay_s):
+        self.record(session, procedure, ADD, dist, delay_s)
+
+    def remove_point(self, session, procedure, dist, delay_s):
+        self.record(session, procedure, REMOVE, dist, delay_s)
+
+    def reset(self, session):
+        self.record(session, "", RESET)
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.batch_size, timeout=self.flush_interval)
+            self._flush(conn)
+
+    def _flush(self, conn):
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("INSERT INTO events (ts, session, procedure, op, dist_m, delay_s) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", batch)
+                conn.execute("COMMIT")
+                self.written += len(batch)
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                with self._cond:
+                    self._pending[:0] = batch  # retried with the next batch, in order
+
+    def flush(self):
+        """Write the queued events now (the teacher view sees its own process's latest rows)."""
+        self._flush(self._connection())
+
+    # --- Reads: per-thread connections, incremental summary ---
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def summary(self):
+        """Class results, updated with the events written since the last call."""
+        with self._summary_lock:
+            rows = self._connection().execute(
+                "SELECT seq, session, procedure, op, dist_m, delay_s FROM events WHERE seq > ? ORDER BY seq",
+                (self._summary.seq,)).fetchall()
+            self._summary.apply(rows)
+            return self._summary.snapshot()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def class_store():
+    # One store per server process; SIMULADOR_CLASS_DB names the database file
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ClassStore(os.environ.get("SIMULADOR_CLASS_DB") or DEFAULT_PATH)
+        return _store
@@ -0,0 +1,89 @@
+"""Peak-preserving decimation of long scope records down to screen width.
+
+``minmax_decimate`` keeps the minimum and maximum of every bucket, in the
+order they occur, so pulse peaks and the noise envelope survive exactly.
+It is fully vectorized and works on batches (time on the last axis).
+``lttb`` (Largest-Triangle-Three-Buckets) keeps one representative point
+per bucket and is useful when a single visually faithful line is wanted.
+``xy_decimate`` thins a pair of channels for an XY screen, where the two
+must stay sample-aligned.
+"""
+
+import numpy as np
+
+SCREEN_BUCKETS = 1000  # ~ screen width in pixels
+
+
+def _pad_to_buckets(y, n_buckets):
+    n = y.shape[-1]
+    size = -(-n // n_buckets)  # ceil
+    pad = size * n_buckets - n
+    if pad:
+        # Repeat the last sample: it cannot create a new min or max
+        y = np.concatenate([y, np.repeat(y[..., -1:], pad, axis=-1)], axis=-1)
+    return y.reshape(y.shape[:-1] + (n_buckets, size)), size
+
+
+def minmax_decimate(t, *channels, n_buckets=SCREEN_BUCKETS):
+    """Reduce uniformly sampled traces to ``2 * n_buckets`` points each.
+
+    Returns ``(t_dec, *channels_dec)``; ``t_dec`` stays uniformly spaced
+    (half a bucket apart) so it can be used as a plain time base.
+    Records already shorter than ``2 * n_buckets`` are returned unchanged.
+    """
+    t = np.asarray(t)
+    n = t.shape[-1]
+    if n <= 2 * n_buckets:
+        return (t,) + tuple(np.asarray(ch) for ch in channels)
+
+    out = []
+    for ch in channels:
+        blocks, size = _pad_to_buckets(np.asarray(ch), n_buckets)
+        imin = blocks.argmin(axis=-1)[..., np.newaxis]
+        imax = blocks.argmax(axis=-1)[..., np.newaxis]
+        vmin = np.take_along_axis(blocks, imin, axis=-1)[..., 0]
+        vmax = np.take_along_axis(blocks, imax, axis=-1)[..., 0]
+        min_first = (imin < imax)[..., 0]
+        pairs = np.stack([np.where(min_first, vmin, vmax), np.where(min_first, vmax, vmin)], axis=-1)
+        out.append(pairs.reshape(pairs.shape[:-2] + (2 * n_buckets,)))
+
+    dt = (t[-1] - t[0]) / (n - 1)
+    half = size * dt / 2
+    t_dec = t[0] + (np.arange(2 * n_buckets) + 0.5) * half
+    return (t_dec,) + tuple(out)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of a single trace."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def xy_decimate(ch1, ch2, n_points=2 * SCREEN_BUCKETS):
+    """Every k-th sample of both channels, at most ``n_points`` each (views, no copies).
+
+    Per-bucket extremes would pair a CH1 sample with a CH2 sample from another
+    instant; the figure of a steady signal is retraced every period, so a
+    plain stride loses nothing.
+    """
+    ch1 = np.asarray(ch1)
+    ch2 = np.asarray(ch2)
+    step = max(1, -(-ch1.shape[-1] // n_points))
+    return ch1[..., ::step], ch2[..., ::step]
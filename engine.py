@@ -0,0 +1,276 @@
+"""Headless signal-synthesis engine for the A.L. 2.2 simulator.
+
+Everything here is plain NumPy: no Streamlit, no plotting. Every function
+broadcasts over its parameters, so a single call can synthesize one trace
+for the UI or many thousands of traces for grading and precomputation.
+Traces are always laid out with time on the last axis.
+
+The only state is a small cache of hose transfer functions and per-thread
+spectrum buffers, both reused across reruns.
+"""
+
+import functools
+import threading
+
+import numpy as np
+
+# --- Physical constants ---
+HOSE_LENGTH = 15.0        # m, Procedure I hose
+V0 = 331.29               # m/s, speed of sound at 0 degC
+DV_DT = 0.61              # m/s per degC
+
+# --- Procedure I (impulse/echo) ---
+IMPULSE_WINDOW = 0.15     # s, 150 ms window: long enough for the hose echo (~3 x 44 ms)
+IMPULSE_SAMPLES = 3000
+PULSE_T0 = 0.005          # s, first pulse slightly after t=0 for visibility
+PULSE_WIDTH = 0.002       # s, Gaussian sigma of the wood-block clap
+ECHO_GAIN = 0.6           # attenuation of the pulse after the hose
+IMPULSE_NOISE = 0.02
+TIMING_SPREAD = 0.005     # relative spread of the "measured" propagation time
+IMPULSE_MODELS = ("delay", "hose")  # pure delay (Gaussian copy) or the lossy hose below
+
+# --- Realistic hose: visco-thermal wall losses, dispersion and end reflection ---
+HOSE_RADIUS = 0.0095      # m, inner radius of a 3/4" garden hose
+END_REFLECTION = -0.8     # round trip: microphone end (~closed) times open entrance (~ -1)
+AIR_VISCOSITY = 1.81e-5   # Pa s
+GAMMA = 1.4
+PRANDTL = 0.71
+HOSE_MODEL_RATE = 20_000.0  # S/s, highest rate the hose filter runs at; the pulse has no content above ~500 Hz
+
+# --- Procedure II (phase shift) ---
+PHASE_SAMPLES = 1000
+PHASE_PERIODS = 5         # periods shown on screen
+MIN_PHASE_WINDOW = 0.002  # s
+MIC_GAIN = 0.8
+PHASE_NOISE = 0.05
+
+# --- "Real scope" acquisition ---
+SAMPLE_RATES = (1e6, 2e6, 5e6, 10e6)  # S/s, typical bench-scope memory depth settings
+
+
+def speed_of_sound(temperature):
+    # v = 331.29 + 0.61 * T
+    return V0 + DV_DT * np.asarray(temperature, dtype=float)
+
+
+def generate_pulse(t, t0, width=PULSE_WIDTH):
+    return np.exp(-((t - t0)**2) / (2 * width**2))
+
+
+def _noise(rng, shape, scale):
+    # ``rng``: a Generator, or anything with its ``standard_normal(shape)`` (e.g. noise_bank.BankedNoise)
+    if scale == 0:
+        return np.zeros(shape)
+    if rng is None:
+        rng = np.random.default_rng()
+    return scale * rng.standard_normal(shape)
+
+
+def record_length(window, sample_rate):
+    return int(round(float(window) * sample_rate)) + 1
+
+
+def acquisition_time_base(window, sample_rate):
+    # Sample times of a record of ``window`` seconds acquired at ``sample_rate``
+    return np.arange(record_length(window, sample_rate)) / sample_rate
+
+
+# --- Procedure I ---
+def impulse_time_base(total_time=IMPULSE_WINDOW, n=IMPULSE_SAMPLES):
+    return np.linspace(0, total_time, n)
+
+
+def draw_timing_factor(size=None, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng.normal(1.0, TIMING_SPREAD, size)
+
+
+def impulse_delay(temperature, length=HOSE_LENGTH, timing_factor=1.0):
+    return length / speed_of_sound(temperature) * np.asarray(timing_factor, dtype=float)
+
+
+def air_density(temperature):
+    # kg/m^3 at 1 atm
+    return 352.98 / (np.asarray(temperature, dtype=float) + 273.15)
+
+
+def wall_attenuation(freq, temperature, radius=HOSE_RADIUS):
+    """Kirchhoff visco-thermal loss of a rigid tube, in Np/m."""
+    viscous = np.sqrt(np.pi * np.asarray(freq, dtype=float) * AIR_VISCOSITY / air_density(temperature))
+    return viscous / (radius * speed_of_sound(temperature)) * (1 + (GAMMA - 1) / np.sqrt(PRANDTL))
+
+
+def _fft_size(n, rate, temperature, length):
+    # Room for the echo (three passes) of the latest pulse and, doubled, for the slow tail
+    # the wall losses leave behind it, so neither wraps around onto the screen
+    span = PULSE_T0 + 3 * float(impulse_delay(temperature, length)) * (1 + 10 * TIMING_SPREAD) + 10 * PULSE_WIDTH
+    need = max(n, int(np.ceil(2 * span * rate)))
+    return 1 << (need - 1).bit_length()
+
+
+@functools.lru_cache(maxsize=32)
+def hose_spectra(temperature, length, rate, n_fft, t0=PULSE_T0):
+    """Spectra of the source pulse after one pass and after three passes (the echo) of the hose.
+
+    Propagation delays are left out: they change with every click and are
+    applied per call. Returns read-only ``(freq, direct, echo)`` arrays of
+    ``n_fft // 2 + 1`` bins, in DFT units at ``rate``.
+    """
+    freq = np.fft.rfftfreq(n_fft, 1 / rate)
+    # Analytic spectrum of the Gaussian pulse at t0: no truncation edges to ring through the filter
+    source = PULSE_WIDTH * np.sqrt(2 * np.pi) * rate * np.exp(-2 * (np.pi * PULSE_WIDTH * freq)**2 - 2j * np.pi * freq * t0)
+    # Wall losses attenuate and retard the phase by the same amount: k = w/c + (1 - i) alpha
+    loss = np.exp(-(1 + 1j) * wall_attenuation(freq, temperature) * length)
+    direct = source * loss
+    echo = END_REFLECTION * direct * loss**2
+    for a in (freq, direct, echo):
+        a.flags.writeable = False
+    return freq, direct, echo
+
+
+_buffers = threading.local()
+
+
+def _buffer(name, shape):
+    # Per-thread complex scratch space for single traces, reused while the shape stays the same;
+    # batches (Monte Carlo chunks) get fresh arrays, so nothing batch-sized outlives the call
+    if len(shape) > 1:
+        return np.empty(shape, dtype=complex)
+    buf = getattr(_buffers, name, None)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=complex)
+        setattr(_buffers, name, buf)
+    return buf
+
+
+def hose_response(t, dt, temperature=20.0, length=HOSE_LENGTH):
+    """Noise-free hose-end trace: the source pulse filtered by the hose, plus its echo.
+
+    ``t`` is a uniform time base and ``temperature`` a scalar; ``dt`` (any
+    shape) is the one-way propagation delay. Fine time bases (the "real
+    scope" acquisition) are filtered at ``HOSE_MODEL_RATE`` and linearly
+    interpolated, so the cost does not grow with the sample rate.
+    """
+    t = np.asarray(t, dtype=float)
+    dt = np.asarray(dt, dtype=float)[..., np.newaxis]
+    step = t[1] - t[0]
+    rate = round(min(1 / step, HOSE_MODEL_RATE), 6)
+    on_grid = rate * step > 1 - 1e-9
+    n = len(t) if on_grid else int(np.ceil((t[-1] - t[0]) * rate)) + 2
+    n_fft = _fft_size(n, rate, temperature, length)
+    freq, direct, echo = hose_spectra(round(float(temperature), 1), float(length), rate, n_fft, PULSE_T0 - t[0])
+
+    shape = dt.shape[:-1] + freq.shape
+    shift = _buffer("shift", shape)
+    spectrum = _buffer("spectrum", shape)
+    np.multiply(freq, -2j * np.pi * dt, out=shift)
+    np.exp(shift, out=shift)                 # one pass: delay dt
+    np.multiply(direct, shift, out=spectrum)
+    np.power(shift, 3, out=shift)            # echo: three passes
+    np.multiply(echo, shift, out=shift)
+    spectrum += shift
+    y = np.fft.irfft(spectrum, n_fft, axis=-1)[..., :n]
+    if on_grid:
+        return y
+    m = int(round(1 / (rate * step)))
+    if abs(m * rate * step - 1) < 1e-9:
+        # Acquisition rates are whole multiples of the model rate: fill m points per model step at once
+        blocks = -(-len(t) // m)
+        base = y[..., :blocks, np.newaxis]
+        slope = y[..., 1:blocks + 1, np.newaxis] - base
+        return (base + slope * (np.arange(m) / m)).reshape(y.shape[:-1] + (blocks * m,))[..., :len(t)]
+    pos = (t - t[0]) * rate
+    i = np.minimum(pos.astype(int), n - 2)
+    frac = pos - i
+    return y[..., i] * (1 - frac) + y[..., i + 1] * frac
+
+
+def hose_peak_delay(dt, temperature=20.0, length=HOSE_LENGTH):
+    """Source peak to hose-end peak time, as read off the screen.
+
+    Dispersion makes it slightly longer than the propagation delay ``dt``.
+    """
+    t = impulse_time_base()
+    y = hose_response(t, dt, temperature, length)
+    i = np.clip(y.argmax(axis=-1), 1, len(t) - 2)[..., np.newaxis]
+    y0, y1, y2 = (np.take_along_axis(y, i + k, axis=-1)[..., 0] for k in (-1, 0, 1))
+    denom = y0 - 2 * y1 + y2
+    offset = np.where(denom != 0, 0.5 * (y0 - y2) / np.where(denom != 0, denom, 1), 0.0)
+    return t[i[..., 0]] + offset * (t[1] - t[0]) - PULSE_T0
+
+
+def synthesize_impulse(t, dt, noise=IMPULSE_NOISE, rng=None, model="delay", temperature=20.0, length=HOSE_LENGTH):
+    """Source (CH1) and hose-end (CH2) traces for propagation delays ``dt``.
+
+    ``dt`` may have any shape; the result has shape ``dt.shape + t.shape``.
+    ``model="delay"`` copies the pulse ``dt`` later with a fixed gain;
+    ``model="hose"`` filters it through the lossy hose at ``temperature``
+    (see ``hose_response``).
+    """
+    dt = np.asarray(dt, dtype=float)[..., np.newaxis]
+    shape = np.broadcast_shapes(dt.shape, np.shape(t))
+    sig1 = np.broadcast_to(generate_pulse(t, PULSE_T0), shape) + _noise(rng, shape, noise)
+    if model == "hose":
+        clean = hose_response(t, dt[..., 0], temperature, length)
+    else:
+        clean = ECHO_GAIN * generate_pulse(t, PULSE_T0 + dt)
+    sig2 = clean + _noise(rng, shape, noise)
+    return sig1, sig2
+
+
+def simulate_impulse(temperature, trials=None, t=None, noise=IMPULSE_NOISE, rng=None, model="delay"):
+    """Run the impulse experiment ``trials`` times per temperature.
+
+    Returns ``(dt, t, sig1, sig2)`` where ``dt`` has shape
+    ``temperature.shape + (trials,)`` (or ``temperature.shape`` when
+    ``trials`` is None). The hose model needs a scalar temperature.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if t is None:
+        t = impulse_time_base()
+    temperature = np.asarray(temperature, dtype=float)
+    size = temperature.shape if trials is None else temperature.shape + (trials,)
+    if trials is not None:
+        temperature = temperature[..., np.newaxis]
+    dt = impulse_delay(temperature, timing_factor=draw_timing_factor(size, rng))
+    if model == "hose":
+        sig1, sig2 = synthesize_impulse(t, dt, noise=noise, rng=rng, model=model, temperature=temperature.item())
+    else:
+        sig1, sig2 = synthesize_impulse(t, dt, noise=noise, rng=rng)
+    return dt, t, sig1, sig2
+
+
+# --- Procedure II ---
+def phase_window(freq):
+    # Show ~5 periods, never less than 2 ms
+    return np.maximum(PHASE_PERIODS / np.asarray(freq, dtype=float), MIN_PHASE_WINDOW)
+
+
+def phase_time_base(freq, n=PHASE_SAMPLES):
+    window = phase_window(freq)
+    return window[..., np.newaxis] * np.linspace(0, 1, n)
+
+
+def synthesize_phase_shift(freq, dist, temperature, n=PHASE_SAMPLES, noise=PHASE_NOISE, rng=None):
+    """Generator (CH1) and microphone (CH2) sines for a grid of settings.
+
+    ``freq``, ``dist`` and ``temperature`` broadcast together; the result
+    is ``(t, sig1, sig2)``, each with shape ``broadcast_shape + (n,)``.
+    """
+    freq, dist, temperature = np.broadcast_arrays(
+        np.asarray(freq, dtype=float), np.asarray(dist, dtype=float), np.asarray(temperature, dtype=float))
+    delay = (dist / speed_of_sound(temperature))[..., np.newaxis]
+    omega = (2 * np.pi * freq)[..., np.newaxis]
+    t = phase_time_base(freq, n)
+
+    # Signal 1: source; Signal 2: microphone, delayed by dist/v, with noise
+    sig1 = np.sin(omega * t)
+    sig2 = MIC_GAIN * np.sin(omega * (t - delay)) + _noise(rng, t.shape, noise)
+    return t, sig1, sig2
+
+
+def phase_difference_deg(freq, dist, temperature):
+    wavelength = speed_of_sound(temperature) / np.asarray(freq, dtype=float)
+    return (np.asarray(dist, dtype=float) / wavelength * 360) % 360
@@ -0,0 +1,222 @@
+"""Answer checks shared by the UI and the batch grader.
+
+The check functions are plain NumPy and work on scalars (the
+"Verificar Tempo"/"Verificar Velocidade" buttons) as well as on whole
+columns of submissions.
+
+Batch grading streams a CSV or JSONL file of submissions in chunks,
+grades each chunk column-wise (optionally on several processes) and
+writes a CSV report:
+
+    python grading.py submissions.csv -o relatorio.csv --workers 4
+
+Recognised columns (all optional except ``temperature``):
+
+- ``student``: identifier, copied to the report
+- ``temperature``: air temperature set in the simulator (°C)
+- ``actual_dt_ms``: the session's simulated propagation time; defaults
+  to the theoretical 15 m / v(T) when missing
+- ``model``: the session's hose model, ``hose`` or ``delay`` (default
+  ``--model``, the simulator's default ``hose``); with the lossy hose the
+  answer is checked against the peak-to-peak time, as in the simulator
+- ``user_dt_ms``, ``user_v``: the Procedure I answers
+- ``p2_distances``, ``p2_delays_ms``: the Procedure II table, as lists
+  in JSONL or ``;``-separated numbers in CSV
+"""
+
+import argparse
+import functools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import engine
+
+DT_TOLERANCE_MS = 0.5    # +/- on the measured Δt
+V_TOLERANCE = 1.0        # m/s, rounding slack between the student's Δt and v
+THEORY_TOLERANCE = 10.0  # m/s, "very close to the theoretical value"
+
+DEFAULT_CHUNKSIZE = 50_000
+DEFAULT_MODEL = "hose"   # the simulator's default Procedure I model
+
+
+@functools.lru_cache(maxsize=256)
+def hose_dispersion(temperature):
+    """Extra time (s) dispersion adds to the hose's peak-to-peak delay at ``temperature``.
+
+    It does not depend on the delay itself (to within 1e-8 s over the
+    timing jitter), so one synthesized trace per temperature is enough.
+    """
+    dt = float(engine.impulse_delay(temperature))
+    return float(engine.hose_peak_delay(dt, temperature)) - dt
+
+
+def expected_dt_ms(dt, temperature, model=DEFAULT_MODEL):
+    """The Δt (ms) a student reads off the screen for a propagation time ``dt`` (s) at ``temperature``.
+
+    In the lossy hose dispersion delays the visible peak, and students
+    measure peak to peak. ``temperature`` is a scalar; ``dt`` any shape.
+    """
+    dt = np.asarray(dt, dtype=float)
+    if model == "hose":
+        dt = dt + hose_dispersion(float(temperature))
+    return dt * 1000
+
+
+def check_time(user_dt_ms, actual_dt_ms):
+    return np.abs(np.asarray(user_dt_ms, dtype=float) - actual_dt_ms) <= DT_TOLERANCE_MS
+
+
+def expected_speed(user_dt_ms, length=engine.HOSE_LENGTH):
+    # v = d / Δt with the student's own Δt (converted to seconds); NaN when Δt is not positive
+    user_dt_ms = np.asarray(user_dt_ms, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(user_dt_ms > 0, length / (user_dt_ms / 1000.0), np.nan)
+
+
+def check_speed(user_v, user_dt_ms):
+    with np.errstate(invalid="ignore"):
+        return np.abs(np.asarray(user_v, dtype=float) - expected_speed(user_dt_ms)) <= V_TOLERANCE
+
+
+def near_theory(user_v, v_theo):
+    return np.abs(np.asarray(user_v, dtype=float) - v_theo) <= THEORY_TOLERANCE
+
+
+def percent_error(v, v_theo):
+    return np.abs(np.asarray(v, dtype=float) - v_theo) / v_theo * 100
+
+
+def _parse_list(value):
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value, dtype=float)
+    if value is None or (isinstance(value, float) and np.isnan(value)) or str(value).strip() == "":
+        return np.empty(0)
+    return np.array([float(v) for v in str(value).split(";") if v.strip()], dtype=float)
+
+
+def grouped_regression(distances, delays_ms):
+    """Speed fit (distance vs. delay in s) for each row's table, vectorized over rows.
+
+    Returns ``(slope, slope_stderr, r_squared, n_points)`` arrays.
+    """
+    d = [_parse_list(v) for v in distances]
+    t = [_parse_list(v) for v in delays_ms]
+    rows = len(d)
+    n = np.array([min(len(a), len(b)) for a, b in zip(d, t)], dtype=int)
+    group = np.repeat(np.arange(rows), n)
+    y = np.concatenate([a[:k] for a, k in zip(d, n)]) if rows else np.empty(0)
+    x = np.concatenate([b[:k] for b, k in zip(t, n)]) / 1000.0 if rows else np.empty(0)
+    valid = np.isfinite(x) & np.isfinite(y)
+    group, x, y = group[valid], x[valid], y[valid]
+
+    count = np.bincount(group, minlength=rows).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = np.bincount(group, x, rows) / count
+        mean_y = np.bincount(group, y, rows) / count
+        dx = x - mean_x[group]
+        dy = y - mean_y[group]
+        cxx = np.bincount(group, dx * dx, rows)
+        cyy = np.bincount(group, dy * dy, rows)
+        cxy = np.bincount(group, dx * dy, rows)
+        ok = (count > 1) & (cxx > 0)
+        slope = np.where(ok, cxy / cxx, np.nan)
+        residual = np.maximum(cyy - slope * cxy, 0.0)
+        stderr = np.where(ok & (count > 2), np.sqrt(residual / (count - 2) / cxx), np.nan)
+        r2 = np.where(ok & (cyy > 0), 1 - residual / cyy, np.nan)
+    return slope, stderr, r2, count.astype(int)
+
+
+def grade_frame(df, model=DEFAULT_MODEL):
+    """Grade a DataFrame of submissions; returns the report DataFrame."""
+    import pandas as pd
+
+    def column(name, default=np.nan):
+        return df[name].to_numpy(dtype=float) if name in df else np.full(len(df), default)
+
+    temperature = column("temperature")
+    v_theo = engine.speed_of_sound(temperature)
+    actual_dt_ms = column("actual_dt_ms")
+    dt = np.where(np.isnan(actual_dt_ms), engine.impulse_delay(temperature), actual_dt_ms / 1000)
+    models = df["model"].fillna(model).to_numpy() if "model" in df else np.full(len(df), model)
+    target_dt_ms = dt * 1000
+    # The hose's dispersion is synthesized once per temperature, whatever the number of rows
+    for temp in np.unique(temperature[(models == "hose") & np.isfinite(temperature)]):
+        rows = (models == "hose") & (temperature == temp)
+        target_dt_ms[rows] = expected_dt_ms(dt[rows], temp, "hose")
+    user_dt_ms = column("user_dt_ms")
+    user_v = column("user_v")
+
+    report = pd.DataFrame(index=df.index)
+    if "student" in df:
+        report["student"] = df["student"]
+    report["temperature"] = temperature
+    report["v_theo"] = v_theo
+    report["expected_dt_ms"] = target_dt_ms
+    report["time_ok"] = check_time(user_dt_ms, target_dt_ms)
+    report["expected_v"] = expected_speed(user_dt_ms)
+    report["speed_ok"] = check_speed(user_v, user_dt_ms)
+    report["near_theory"] = near_theory(user_v, v_theo)
+    report["error_pct_p1"] = percent_error(user_v, v_theo)
+
+    if "p2_distances" in df and "p2_delays_ms" in df:
+        slope, stderr, r2, n = grouped_regression(df["p2_distances"], df["p2_delays_ms"])
+        report["p2_points"] = n
+        report["v_p2"] = slope
+        report["v_p2_stderr"] = stderr
+        report["r2_p2"] = r2
+        report["error_pct_p2"] = percent_error(slope, v_theo)
+    return report
+
+
+def read_submissions(path, chunksize=DEFAULT_CHUNKSIZE):
+    import pandas as pd
+    if path.endswith((".jsonl", ".ndjson")):
+        return pd.read_json(path, lines=True, chunksize=chunksize)
+    return pd.read_csv(path, chunksize=chunksize)
+
+
+def grade_file(path, output, workers=1, chunksize=DEFAULT_CHUNKSIZE, model=DEFAULT_MODEL):
+    """Stream ``path`` chunk by chunk into the CSV report ``output``; returns the row count."""
+    chunks = read_submissions(path, chunksize)
+    rows = 0
+    with open(output, "w", newline="", encoding="utf-8") as out:
+        for i, report in enumerate(_graded_chunks(chunks, workers, model)):
+            report.to_csv(out, header=i == 0, index=False)
+            rows += len(report)
+    return rows
+
+
+def _graded_chunks(chunks, workers, model):
+    if workers <= 1:
+        for chunk in chunks:
+            yield grade_frame(chunk, model)
+        return
+    # Keep at most two chunks per worker in flight so big files are never read ahead in full
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(grade_frame, chunk, model))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correção automática das respostas do simulador A.L. 2.2")
+    parser.add_argument("submissions", help="ficheiro CSV ou JSONL com as respostas")
+    parser.add_argument("-o", "--output", default="relatorio.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--model", choices=engine.IMPULSE_MODELS, default=DEFAULT_MODEL,
+                        help="modelo da mangueira das sessões sem a coluna 'model'")
+    args = parser.parse_args(argv)
+    rows = grade_file(args.submissions, args.output, args.workers, args.chunksize, args.model)
+    print(f"{rows:,d} respostas corrigidas -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Monte Carlo uncertainty engine for both procedures.
+
+Each trial re-runs a whole simulated experiment -- random timing factor
+and noise realization -- and then measures it the way an automated
+student would: the delay is read off the traces by cross-correlation
+(see ``analysis``), the speed follows from it. Trials are generated in
+batched NumPy chunks; chunks are spread across a process pool when more
+than one worker is requested, so memory stays bounded for 10^6 trials.
+
+Usage:
+    python montecarlo.py impulse --trials 100000 --workers 4
+    python montecarlo.py phase --trials 10000 --freq 1500
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import analysis
+import engine
+
+DEFAULT_CHUNK = 2048  # traces per chunk: ~16 MB per 1000-sample channel array
+DEFAULT_DISTANCES = tuple(np.round(np.arange(0.1, 1.51, 0.1), 2))
+
+
+def impulse_chunk(temperature, trials, seed, model="delay"):
+    rng = np.random.default_rng(seed)
+    _, t, sig1, sig2 = engine.simulate_impulse(temperature, trials=trials, rng=rng, model=model)
+    dt = analysis.estimate_impulse_delay(t, sig1, sig2)
+    return dt, engine.HOSE_LENGTH / dt
+
+
+def phase_chunk(temperature, trials, seed, freq=1500, distances=DEFAULT_DISTANCES):
+    """One full distance series per trial; the speed is the slope of d vs. delay."""
+    rng = np.random.default_rng(seed)
+    dist = np.asarray(distances, dtype=float)
+    t, sig1, sig2 = engine.synthesize_phase_shift(freq, np.broadcast_to(dist, (trials, len(dist))), temperature, rng=rng)
+    measured = analysis.estimate_phase_delay(t, sig1, sig2, freq)
+    # The scope only shows the delay modulo one period; students count the whole periods
+    period = 1 / freq
+    true_delay = dist / engine.speed_of_sound(temperature)
+    delay = measured + np.round((true_delay - measured) / period) * period
+
+    # Least-squares slope of every series at once
+    dx = delay - delay.mean(axis=-1, keepdims=True)
+    dy = dist - dist.mean()
+    v = (dx * dy).sum(axis=-1) / (dx * dx).sum(axis=-1)
+    return delay, v
+
+
+CHUNK_FUNCTIONS = {"impulse": impulse_chunk, "phase": phase_chunk}
+
+
+def _run_chunk(args):
+    procedure, temperature, trials, seed, kwargs = args
+    return CHUNK_FUNCTIONS[procedure](temperature, trials, seed, **kwargs)
+
+
+def traces_per_trial(procedure, distances=DEFAULT_DISTANCES, **kwargs):
+    return len(distances) if procedure == "phase" else 1
+
+
+def run(procedure, temperature=20.0, trials=10_000, workers=1, chunk=DEFAULT_CHUNK, seed=None, **kwargs):
+    """Simulate ``trials`` repetitions and return the per-trial results.
+
+    ``chunk`` bounds the number of traces synthesized at once, so a
+    Procedure II trial (one trace per distance) uses smaller chunks.
+
+    Returns a dict with arrays ``dt`` (impulse: delay per trial; phase:
+    delays per series), ``v`` and ``error_pct`` (vs. the theoretical
+    speed) plus ``trials_per_s``.
+    """
+    chunk = max(1, chunk // traces_per_trial(procedure, **kwargs))
+    sizes = [min(chunk, trials - start) for start in range(0, trials, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(procedure, temperature, size, s, kwargs) for size, s in zip(sizes, seeds)]
+
+    start = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_chunk, jobs))
+    else:
+        results = [_run_chunk(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    dt = np.concatenate([r[0] for r in results])
+    v = np.concatenate([r[1] for r in results])
+    v_theo = float(engine.speed_of_sound(temperature))
+    return {
+        "procedure": procedure,
+        "temperature": temperature,
+        "v_theo": v_theo,
+        "dt": dt,
+        "v": v,
+        "error_pct": np.abs(v - v_theo) / v_theo * 100,
+        "elapsed_s": elapsed,
+        "trials_per_s": trials / elapsed if elapsed else float("inf"),
+    }
+
+
+def summarize(values):
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {"mean": float(np.mean(values)), "std": float(np.std(values, ddof=1)),
+            "p5": float(p5), "p50": float(p50), "p95": float(p95)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo do simulador A.L. 2.2")
+    parser.add_argument("procedure", choices=sorted(CHUNK_FUNCTIONS))
+    parser.add_argument("--trials", type=int, default=10_000)
+    parser.add_argument("--temperature", type=float, default=20.0)
+    parser.add_argument("--freq", type=float, default=1500, help="frequência do gerador (procedimento 'phase')")
+    parser.add_argument("--model", choices=engine.IMPULSE_MODELS, default="delay",
+                        help="modelo da mangueira (procedimento 'impulse')")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    kwargs = {"freq": args.freq} if args.procedure == "phase" else {"model": args.model}
+    result = run(args.procedure, args.temperature, args.trials, args.workers, args.chunk, args.seed, **kwargs)
+
+    print(f"{args.trials:,d} ensaios ({args.procedure}) a {args.temperature} °C em {result['elapsed_s']:.2f} s "
+          f"-> {result['trials_per_s']:,.0f} ensaios/s ({args.workers} processos)")
+    print(f"v teórica: {result['v_theo']:.2f} m/s")
+    if args.procedure == "impulse":
+        rows = [("Δt (ms)", result["dt"] * 1000)]
+    else:
+        rows = []
+    rows += [("v (m/s)", result["v"]), ("erro (%)", result["error_pct"])]
+    for name, values in rows:
+        s = summarize(values)
+        print(f"  {name:<9} média {s['mean']:9.3f}  dp {s['std']:7.3f}  P5 {s['p5']:9.3f}  P50 {s['p50']:9.3f}  P95 {s['p95']:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Shared noise bank and per-session random seeds.
+
+Screen traces take their noise from one precomputed, read-only block of
+standard-normal samples, drawn once per process from a fixed seed: a
+trace's noise is a slice of it, chosen by the trace's own seed, so
+identical parameters always give the identical trace, in every process,
+and no random numbers are generated per rerun.
+
+Everything that should differ between students (the timing of a clap,
+the live acquisition) comes from a per-session ``numpy.random.Generator``
+whose seed is recorded in the session so a run can be replayed.
+``SIMULADOR_SEED`` fixes that seed for every session (demos, benchmarks).
+"""
+
+import os
+import threading
+
+import numpy as np
+
+BANK_SIZE = 1 << 22   # samples (32 MB): both channels of a 10 MS/s x 150 ms record
+BANK_SEED = 0
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def bank():
+    # Drawn on first use, then shared read-only by every session and thread
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            values = np.random.default_rng(BANK_SEED).standard_normal(BANK_SIZE)
+            values.flags.writeable = False
+            _bank = values
+        return _bank
+
+
+class BankedNoise:
+    """Generator-like reader of the bank: ``standard_normal`` returns views, not new arrays.
+
+    Successive draws take successive slices starting at an offset set by
+    ``seed``, so the channels of one trace get independent noise. Draws
+    larger than the bank fall back to a Generator seeded the same way.
+    """
+
+    def __init__(self, seed):
+        self.seed = int(seed)
+        self._pos = self.seed % BANK_SIZE
+
+    def standard_normal(self, shape):
+        count = int(np.prod(shape))
+        if count > BANK_SIZE:
+            return np.random.default_rng(self.seed).standard_normal(shape)
+        if self._pos + count > BANK_SIZE:
+            self._pos = 0
+        view = bank()[self._pos:self._pos + count].reshape(shape)
+        self._pos += count
+        return view
+
+
+def new_session_seed():
+    seed = os.environ.get("SIMULADOR_SEED")
+    return int(seed) if seed else int(np.random.SeedSequence().entropy)
@@ -0,0 +1,142 @@
+"""Persistent oscilloscope renderer.
+
+The figure, axes, grid and legend are built once. Each frame only pushes
+new data into the two line artists and, when the time base or the
+vertical scale changes, updates the axis limits. The static background
+(screen, grid, ticks, labels) is cached per set of limits and the traces
+are blitted on top of it, so a slider drag only redraws the traces.
+
+The same figure also serves as the XY (Lissajous) screen: ``update_xy``
+puts CH1 on the horizontal axis and CH2 on the vertical one in the first
+line artist and swaps the axis titles, which just invalidates the cached
+background like any other change of limits.
+
+Figures are created from ``matplotlib.figure.Figure`` directly rather
+than through ``pyplot``, so they never enter the pyplot figure registry
+and are freed as soon as the renderer is closed or garbage-collected.
+"""
+
+import io
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+SCREEN_COLOR = "#1e1e1e"
+CH1_COLOR = "#00ff00"
+CH2_COLOR = "#ffff00"
+
+
+class OscilloscopeRenderer:
+    def __init__(self, figsize=(10, 5), dpi=150):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self._background = None
+        self._limits = None
+        self._mode = "yt"
+        self._build()
+
+    def _build(self):
+        ax = self.ax
+        ax.set_facecolor(SCREEN_COLOR)  # Oscilloscope screen color
+
+        # Traces are animated: excluded from full draws and blitted on top of the cached background
+        self.line1, = ax.plot([], [], color=CH1_COLOR, linewidth=1.5, label="CH1 (Fonte/Gerador)", animated=True)
+        self.line2, = ax.plot([], [], color=CH2_COLOR, linewidth=1.5, label="CH2 (Recetor/Microfone)", animated=True)
+
+        # Setup axis
+        ax.set_xlabel("Tempo (ms)", fontsize=12)
+        ax.set_ylabel("Tensão (V)", fontsize=12)
+
+        # Add minor ticks for grid
+        ax.minorticks_on()
+        ax.grid(which='major', color='#888888', linestyle='-', linewidth=1.0) # Brighter, thicker major grid
+        ax.grid(which='minor', color='#444444', linestyle=':', linewidth=0.6) # Brighter minor grid
+
+        # Legend is drawn after the traces so it stays on top of them
+        self.legend = ax.legend(loc='upper right', facecolor='#333', edgecolor='white', labelcolor='white')
+        self.legend.set_animated(True)
+
+        self.fig.tight_layout()
+
+    @property
+    def closed(self):
+        return self.fig is None
+
+    def _set_mode(self, mode):
+        if self.closed:
+            raise RuntimeError("OscilloscopeRenderer is closed")
+        if mode == self._mode:
+            return
+        xy = mode == "xy"
+        self.ax.set_xlabel("CH1 (V)" if xy else "Tempo (ms)", fontsize=12)
+        self.ax.set_ylabel("CH2 (V)" if xy else "Tensão (V)", fontsize=12)
+        # The axis titles name the channels in XY, so the legend is hidden with CH2's line
+        self.line2.set_visible(not xy)
+        self.legend.set_visible(not xy)
+        self._mode = mode
+        self._limits = None
+
+    def _set_limits(self, limits):
+        if limits != self._limits:
+            self.ax.set_xlim(limits[0], limits[1])
+            self.ax.set_ylim(limits[2], limits[3])
+            self._limits = limits
+            self._background = None
+
+    def update(self, time, ch1, ch2, t_range, y_range=(-1, 1)):
+        self._set_mode("yt")
+        time_ms = np.asarray(time) * 1000
+        self.line1.set_data(time_ms, ch1)
+        self.line2.set_data(time_ms, ch2)
+        self._set_limits((t_range[0] * 1000, t_range[1] * 1000, y_range[0], y_range[1]))
+
+    def update_xy(self, ch1, ch2, x_range=(-1, 1), y_range=(-1, 1)):
+        self._set_mode("xy")
+        self.line1.set_data(ch1, ch2)
+        self._set_limits((x_range[0], x_range[1], y_range[0], y_range[1]))
+
+    def draw(self):
+        if self._background is None:
+            self.canvas.draw()
+            self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        else:
+            self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line1)
+        self.ax.draw_artist(self.line2)
+        self.ax.draw_artist(self.legend)
+
+    def to_rgba(self):
+        self.draw()
+        return np.asarray(self.canvas.buffer_rgba())
+
+    def render_png(self, time=None, ch1=None, ch2=None, t_range=None, y_range=(-1, 1)):
+        if time is not None:
+            self.update(time, ch1, ch2, t_range, y_range)
+        return self._encode_png()
+
+    def render_xy_png(self, ch1, ch2, x_range=(-1, 1), y_range=(-1, 1)):
+        self.update_xy(ch1, ch2, x_range, y_range)
+        return self._encode_png()
+
+    def _encode_png(self):
+        buf = io.BytesIO()
+        # Fast zlib level: frames are short-lived, size matters less than latency
+        Image.fromarray(self.to_rgba()[..., :3]).save(buf, format="png", compress_level=1)
+        return buf.getvalue()
+
+    def close(self):
+        if self.closed:
+            return
+        self.fig.clear()
+        self._background = None
+        self.canvas = None
+        self.fig = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
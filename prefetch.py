@@ -0,0 +1,190 @@
+"""Speculative rendering of the slider positions next to the current one.
+
+Students drag the sliders one step at a time, so after a frame is shown
+the frames one step away in each direction are synthesized and rendered
+in the background into the shared render cache; the next step is then a
+cache hit.
+
+Prefetching must never compete with real reruns:
+
+- a small, fixed thread pool (``SIMULADOR_PREFETCH_WORKERS``, 0 disables);
+- at most ``per_session`` queued frames per session and ``max_pending`` per
+  process; beyond that new requests are dropped, not queued;
+- a session's new request cancels its older, no longer adjacent frames
+  (queued ones are never started, running ones stop before rendering);
+- a job only starts when no foreground rerun is in progress or ended in
+  the last ``QUIET`` seconds, and is dropped if that doesn't happen within
+  ``max_wait`` seconds (under load, prefetching simply stops);
+- a rerun that needs a frame a worker is already rendering waits for it
+  (``get_or_render``) instead of rendering it a second time.
+
+Each worker thread renders with its own ``OscilloscopeRenderer``.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 2
+PER_SESSION = 4          # queued or running frames per session
+MAX_PENDING = 32         # per process
+MAX_WAIT = 2.0           # s a job may wait for the foreground to go idle
+IDLE_POLL = 0.01         # s
+QUIET = 0.05             # s without foreground reruns before a job may start
+JOIN_TIMEOUT = 1.0       # s a rerun waits for a frame a worker is rendering
+FOREGROUND_TIMEOUT = 10.0  # s; a rerun that never reported its end (st.stop, st.rerun) stops counting
+
+_local = threading.local()
+
+
+def _renderer():
+    renderer = getattr(_local, "renderer", None)
+    if renderer is None:
+        from oscilloscope import OscilloscopeRenderer
+        renderer = _local.renderer = OscilloscopeRenderer()
+    return renderer
+
+
+class Prefetcher:
+    def __init__(self, cache, workers=DEFAULT_WORKERS, per_session=PER_SESSION, max_pending=MAX_PENDING,
+                 max_wait=MAX_WAIT):
+        self.cache = cache
+        self.per_session = per_session
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.RLock()  # cancel() runs done-callbacks in the caller's thread
+        self._jobs = {}        # session -> {key: Future} of the frames it still wants
+        self._foreground = {}  # thread id -> start time of the rerun it is running
+        self._idle_since = 0.0  # when the last rerun ended
+        self._rendering = {}   # key -> Event set once a worker's render is in the cache
+        self.stats = {"rendered": 0, "skipped": 0, "cancelled": 0, "dropped": 0, "expired": 0}
+
+    # --- Foreground reruns ---
+
+    def foreground_started(self):
+        with self._lock:
+            self._foreground[threading.get_ident()] = time.monotonic()
+
+    def foreground_finished(self):
+        with self._lock:
+            self._foreground.pop(threading.get_ident(), None)
+            self._idle_since = time.monotonic()
+
+    def busy(self):
+        now = time.monotonic()
+        with self._lock:
+            return (now - self._idle_since < QUIET
+                    or any(started > now - FOREGROUND_TIMEOUT for started in self._foreground.values()))
+
+    def get_or_render(self, key, render):
+        """``cache.get_or_render`` for reruns: a frame a worker is rendering right now is waited for."""
+        data = self.cache.get(key)
+        if data is None:
+            with self._lock:
+                rendering = self._rendering.get(key)
+            if rendering is not None and rendering.wait(JOIN_TIMEOUT):
+                data = self.cache.get(key)
+            if data is None:
+                data = render()
+                self.cache.put(key, data)
+        return data
+
+    # --- Jobs ---
+
+    def pending(self, session=None):
+        with self._lock:
+            if session is not None:
+                return len(self._jobs.get(session, ()))
+            return sum(len(jobs) for jobs in self._jobs.values())
+
+    def submit(self, session, jobs):
+        """Queue ``(key, render)`` jobs, most likely next step first; ``render(renderer)`` returns PNG bytes.
+
+        Replaces the session's previous request: its frames not in ``jobs``
+        are cancelled. Returns the number of frames queued.
+        """
+        jobs = [(key, render) for key, render in jobs if key not in self.cache]
+        wanted = {key for key, _ in jobs}
+        queued = 0
+        stale = []
+        with self._lock:
+            mine = self._jobs.setdefault(session, {})
+            for key in [key for key in mine if key not in wanted]:
+                # Queued: never starts. Running: no longer listed, so it stops before rendering
+                self.stats["cancelled"] += 1
+                stale.append(mine.pop(key))
+            for key, render in jobs:
+                if key in mine:
+                    continue
+                if len(mine) >= self.per_session or self.pending() >= self.max_pending:
+                    self.stats["dropped"] += 1
+                    continue
+                future = self._pool.submit(self._run, session, key, render)
+                mine[key] = future
+                future.add_done_callback(lambda done, session=session, key=key: self._forget(session, key, done))
+                queued += 1
+            if not mine:
+                self._jobs.pop(session, None)
+        # Cancelled only now: cancel() runs _forget right away, which must see the session's new jobs
+        for future in stale:
+            future.cancel()
+        return queued
+
+    def _forget(self, session, key, future):
+        with self._lock:
+            mine = self._jobs.get(session)
+            if mine is not None and mine.get(key) is future:
+                del mine[key]
+            if not mine:
+                self._jobs.pop(session, None)
+
+    def _wanted(self, session, key):
+        with self._lock:
+            return key in self._jobs.get(session, ())
+
+    def _run(self, session, key, render):
+        deadline = time.monotonic() + self.max_wait
+        while self.busy():
+            if time.monotonic() > deadline or not self._wanted(session, key):
+                with self._lock:
+                    self.stats["expired"] += 1
+                return
+            time.sleep(IDLE_POLL)
+        with self._lock:
+            if key in self._rendering or key in self.cache or key not in self._jobs.get(session, ()):
+                self.stats["skipped"] += 1
+                return
+            done = self._rendering[key] = threading.Event()
+        try:
+            self.cache.put(key, render(_renderer()))
+            with self._lock:
+                self.stats["rendered"] += 1
+        finally:
+            with self._lock:
+                del self._rendering[key]
+            done.set()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def neighbours(value, step, lo, hi):
+    # Values one slider step away, inside the slider's range (rounded as the slider would send them)
+    return [round(v, 9) for v in (value + step, value - step) if lo - 1e-9 <= v <= hi + 1e-9]
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def prefetcher():
+    # One pool per server process, feeding the shared render cache; None when disabled
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            from render_cache import shared_cache
+            workers = int(os.environ.get("SIMULADOR_PREFETCH_WORKERS", DEFAULT_WORKERS))
+            _prefetcher = Prefetcher(shared_cache(), workers) if workers > 0 else False
+        return _prefetcher or None
@@ -0,0 +1,246 @@
+"""Per-rerun timing of the script's hot sections.
+
+``app.py`` opens one profile per script (or fragment) run and wraps each
+stage in ``section(name)``. Wall time is always recorded; allocations
+(peak traced memory above the section's start) only while ``tracemalloc``
+is tracing. ``SIMULADOR_PROFILE_ALLOC=1`` traces from startup; with
+``SIMULADOR_PROFILE_ALLOC=ui`` the teacher panel offers a toggle, and
+tracing runs while any session has it on. Since tracemalloc's peak is
+process-wide, sections that measure it run one at a time.
+
+Finished reruns go to a process-wide ``Recorder``, which keeps recent
+samples per (procedure, stage) for the panel and optionally writes them to
+the file named by ``SIMULADOR_PROFILE_FILE``: one JSON line per rerun, or
+for a ``.prom`` path the Prometheus text format with cumulative counters.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+HISTORY = 500          # recent samples kept per (procedure, stage)
+PROM_INTERVAL = 5.0    # seconds between rewrites of a Prometheus file
+ACTIVE_WINDOW = 60.0   # a session counts as active if it reran this recently
+ALLOC_WAIT = 1.0       # s a section waits for another one's allocation measurement, then is only timed
+ALLOC_MODE = os.environ.get("SIMULADOR_PROFILE_ALLOC", "")  # "1": always trace, "ui": teacher toggle
+
+_local = threading.local()
+_alloc_lock = threading.RLock()  # held by the section measuring allocations
+_alloc_sessions = {}             # session -> last rerun that asked for allocation tracing
+_alloc_sessions_lock = threading.Lock()
+
+
+class RerunProfile:
+    def __init__(self, session, procedure, fragment=False):
+        self.session = session
+        self.procedure = procedure
+        self.fragment = fragment
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}  # name -> [seconds, peak allocation in bytes or None]
+
+    @contextmanager
+    def section(self, name):
+        # reset_peak() is process-wide: only one section (and not one nested in it) measures at a time
+        measuring = (tracemalloc.is_tracing() and not getattr(_local, "measuring", False)
+                     and _alloc_lock.acquire(timeout=ALLOC_WAIT))
+        if measuring:
+            _local.measuring = True
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stage = self.stages.setdefault(name, [0.0, None])
+            stage[0] += elapsed  # a stage may run more than once per rerun
+            if measuring:
+                if tracemalloc.is_tracing():
+                    stage[1] = max(stage[1] or 0, tracemalloc.get_traced_memory()[1] - base)
+                _local.measuring = False
+                _alloc_lock.release()
+
+    def record(self):
+        return {
+            "ts": round(self.started, 3),
+            "session": self.session,
+            "procedure": self.procedure,
+            "fragment": self.fragment,
+            "total_s": time.perf_counter() - self._start,
+            "stages": {name: {"s": s, "alloc_bytes": alloc} for name, (s, alloc) in self.stages.items()},
+        }
+
+
+def current():
+    return getattr(_local, "profile", None)
+
+
+def begin(session, procedure, fragment=False):
+    # Replaces any profile left open by a run that ended early (st.stop, rerun, exception)
+    _local.profile = RerunProfile(session, procedure, fragment)
+    return _local.profile
+
+
+def end():
+    """Close the current profile, hand it to the recorder and return its record."""
+    profile = current()
+    if profile is None:
+        return None
+    _local.profile = None
+    record = profile.record()
+    recorder().add(record)
+    return record
+
+
+@contextmanager
+def rerun(session, procedure, fragment=True):
+    # Fragment runs: join the script run's profile when there is one, else profile on their own
+    if current() is not None:
+        yield current()
+        return
+    profile = begin(session, procedure, fragment)
+    try:
+        yield profile
+    finally:
+        if current() is profile:
+            end()
+
+
+def section(name):
+    profile = current()
+    return profile.section(name) if profile is not None else nullcontext()
+
+
+def tracing_allocations():
+    return tracemalloc.is_tracing()
+
+
+def trace_allocations(session, enabled):
+    """A session's allocation-tracing toggle.
+
+    Tracing runs while any session that reran in the last ``ACTIVE_WINDOW``
+    has it on (always, with ``SIMULADOR_PROFILE_ALLOC=1``): turning it off
+    in one session never stops another session's measurements.
+    """
+    now = time.time()
+    with _alloc_sessions_lock:
+        if enabled:
+            _alloc_sessions[session] = now
+        else:
+            _alloc_sessions.pop(session, None)
+        for other, seen in list(_alloc_sessions.items()):
+            if seen < now - ACTIVE_WINDOW:
+                del _alloc_sessions[other]
+        wanted = bool(_alloc_sessions) or ALLOC_MODE == "1"
+        if wanted and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not wanted and tracemalloc.is_tracing():
+            with _alloc_lock:  # not in the middle of a measurement
+                tracemalloc.stop()
+
+
+class Recorder:
+    def __init__(self, path=None, history=HISTORY):
+        self.path = path
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=history))  # (procedure, stage) -> seconds
+        self._totals = defaultdict(lambda: [0, 0.0, 0])  # (procedure, stage) -> [count, seconds, alloc bytes]
+        self._seen = {}  # session -> last rerun time
+        self._prom_written = 0.0
+
+    def add(self, record):
+        with self._lock:
+            self._seen[record["session"]] = record["ts"]
+            for name, stage in record["stages"].items():
+                key = (record["procedure"], name)
+                self._samples[key].append(stage["s"])
+                totals = self._totals[key]
+                totals[0] += 1
+                totals[1] += stage["s"]
+                totals[2] += stage["alloc_bytes"] or 0
+            if self.path:
+                self._write(record)
+
+    def summary(self, procedure):
+        """p50/p95 in seconds over all sessions' recent reruns, per stage of ``procedure``."""
+        with self._lock:
+            samples = {stage: list(values) for (proc, stage), values in self._samples.items() if proc == procedure}
+        out = {}
+        for stage, values in samples.items():
+            p50, p95 = np.percentile(values, [50, 95])
+            out[stage] = {"n": len(values), "p50_s": float(p50), "p95_s": float(p95)}
+        return out
+
+    def active_sessions(self, window=ACTIVE_WINDOW):
+        cutoff = time.time() - window
+        with self._lock:
+            return sum(ts >= cutoff for ts in self._seen.values())
+
+    def _write(self, record):
+        try:
+            if self.path.endswith(".prom"):
+                if time.time() - self._prom_written >= PROM_INTERVAL:
+                    self._write_prometheus()
+                    self._prom_written = time.time()
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # profiling must never break a student's rerun
+
+    def _write_prometheus(self):
+        lines = [
+            "# HELP simulador_stage_seconds Wall time of a stage of the simulator script, per rerun.",
+            "# TYPE simulador_stage_seconds summary",
+        ]
+        allocs = [
+            "# HELP simulador_stage_alloc_bytes_total Peak bytes allocated by a stage, summed over reruns.",
+            "# TYPE simulador_stage_alloc_bytes_total counter",
+        ]
+        for (procedure, stage), (count, seconds, alloc) in sorted(self._totals.items()):
+            labels = f'procedure="{_escape(procedure)}",stage="{_escape(stage)}"'
+            p50, p95 = np.percentile(self._samples[(procedure, stage)], [50, 95])
+            lines += [
+                f'simulador_stage_seconds{{{labels},quantile="0.5"}} {p50:.6f}',
+                f'simulador_stage_seconds{{{labels},quantile="0.95"}} {p95:.6f}',
+                f"simulador_stage_seconds_sum{{{labels}}} {seconds:.6f}",
+                f"simulador_stage_seconds_count{{{labels}}} {count}",
+            ]
+            allocs.append(f"simulador_stage_alloc_bytes_total{{{labels}}} {alloc}")
+        lines += allocs
+        lines += [
+            "# HELP simulador_active_sessions Sessions that reran in the last minute.",
+            "# TYPE simulador_active_sessions gauge",
+            f"simulador_active_sessions {sum(ts >= time.time() - ACTIVE_WINDOW for ts in self._seen.values())}",
+        ]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)  # scrapers never see a half-written file
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def recorder():
+    # One recorder per server process; SIMULADOR_PROFILE_FILE (unset: keep in memory only)
+    # names the JSONL or .prom output, SIMULADOR_PROFILE_ALLOC=1 starts tracemalloc up front
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = Recorder(os.environ.get("SIMULADOR_PROFILE_FILE") or None)
+            if ALLOC_MODE == "1" and not tracemalloc.is_tracing():
+                tracemalloc.start()
+        return _recorder
@@ -0,0 +1,219 @@
+"""Incremental least-squares fit of distance vs. delay ("Análise de Dados").
+
+``RunningFit`` keeps the running means and co-moments of (x, y) -- the
+numerically stable form of the sums Σx, Σy, Σxy, Σx² -- so adding,
+removing or replacing a point is O(1) and slope, intercept, standard
+error and R² are read off directly, without refitting the table.
+
+``MeasurementTable`` stores the rows in preallocated NumPy columns and
+keeps a ``RunningFit`` in sync with them; ``on_point`` lets the class
+results follow the same additions and removals.
+"""
+
+import math
+
+import numpy as np
+
+DIST_COL = "Distância (m)"
+TIME_COL = "Tempo atraso (ms)"
+COLUMNS = (DIST_COL, TIME_COL)
+
+_KEEP = object()  # "cell not edited", as opposed to an edit that cleared the cell
+
+
+class RunningFit:
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.cxx = 0.0
+        self.cyy = 0.0
+        self.cxy = 0.0
+
+    def add(self, x, y):
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        dy = y - self.mean_y
+        self.mean_y += dy / self.n
+        self.cxx += dx * (x - self.mean_x)
+        self.cyy += dy * (y - self.mean_y)
+        self.cxy += dx * (y - self.mean_y)
+
+    def remove(self, x, y):
+        if self.n <= 1:
+            self.__init__()
+            return
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.n -= 1
+        self.mean_x -= dx / self.n
+        self.mean_y -= dy / self.n
+        self.cxx -= dx * (x - self.mean_x)
+        self.cyy -= dy * (y - self.mean_y)
+        self.cxy -= dx * (y - self.mean_y)
+
+    def replace(self, old, new):
+        self.remove(*old)
+        self.add(*new)
+
+    @property
+    def ready(self):
+        return self.n > 1 and self.cxx > 0
+
+    @property
+    def slope(self):
+        return self.cxy / self.cxx if self.ready else math.nan
+
+    @property
+    def intercept(self):
+        return self.mean_y - self.slope * self.mean_x
+
+    @property
+    def residual_ss(self):
+        return max(self.cyy - self.slope * self.cxy, 0.0)
+
+    @property
+    def slope_stderr(self):
+        if not self.ready or self.n < 3:
+            return math.nan
+        return math.sqrt(self.residual_ss / (self.n - 2) / self.cxx)
+
+    @property
+    def r_squared(self):
+        if not self.ready or self.cyy <= 0:
+            return math.nan
+        return 1 - self.residual_ss / self.cyy
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value
+
+
+class MeasurementTable:
+    """Rows of (distance in m, delay in ms) with the speed fit kept in sync.
+
+    The fit regresses distance on delay in seconds, so its slope is the
+    speed of sound. Rows with a missing or non-numeric cell are kept in
+    the table but left out of the fit.
+    """
+
+    def __init__(self, capacity=64):
+        self._dist = np.full(capacity, np.nan)
+        self._time = np.full(capacity, np.nan)
+        self.n = 0
+        self.fit = RunningFit()
+        self.version = 0       # bumped on every change to the rows
+        self.fit_version = 0   # bumped only when the fitted points change
+        self._applied = None
+        self.on_point = None   # called with (+1 or -1, (x, y)) as points enter or leave the fit
+
+    def __len__(self):
+        return self.n
+
+    @staticmethod
+    def _point(dist, time_ms):
+        if math.isfinite(dist) and math.isfinite(time_ms):
+            return time_ms / 1000.0, dist
+        return None
+
+    def _fit_add(self, point):
+        if point is not None:
+            self.fit.add(*point)
+            self.fit_version += 1
+            if self.on_point is not None:
+                self.on_point(1, point)
+
+    def _fit_remove(self, point):
+        if point is not None:
+            self.fit.remove(*point)
+            self.fit_version += 1
+            if self.on_point is not None:
+                self.on_point(-1, point)
+
+    def _grow(self):
+        capacity = 2 * len(self._dist)
+        for name in ("_dist", "_time"):
+            old = getattr(self, name)
+            new = np.full(capacity, np.nan)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def append(self, dist, time_ms):
+        if self.n == len(self._dist):
+            self._grow()
+        dist, time_ms = _number(dist), _number(time_ms)
+        self._dist[self.n] = dist
+        self._time[self.n] = time_ms
+        self.n += 1
+        self.version += 1
+        self._fit_add(self._point(dist, time_ms))
+
+    def update(self, i, dist=_KEEP, time_ms=_KEEP):
+        old = self._point(self._dist[i], self._time[i])
+        if dist is not _KEEP:
+            self._dist[i] = _number(dist)
+        if time_ms is not _KEEP:
+            self._time[i] = _number(time_ms)
+        new = self._point(self._dist[i], self._time[i])
+        self.version += 1
+        if old != new:
+            self._fit_remove(old)
+            self._fit_add(new)
+
+    def delete(self, i):
+        self._fit_remove(self._point(self._dist[i], self._time[i]))
+        self._dist[i:self.n - 1] = self._dist[i + 1:self.n]
+        self._time[i:self.n - 1] = self._time[i + 1:self.n]
+        self.n -= 1
+        self.version += 1
+
+    @property
+    def distances(self):
+        return self._dist[:self.n]
+
+    @property
+    def delays_ms(self):
+        return self._time[:self.n]
+
+    def fitted_points(self):
+        mask = np.isfinite(self.distances) & np.isfinite(self.delays_ms)
+        return self.delays_ms[mask] / 1000.0, self.distances[mask]
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame({DIST_COL: self.distances.copy(), TIME_COL: self.delays_ms.copy()})
+
+    def apply_editor_state(self, state):
+        """Apply a ``st.data_editor`` change set made against ``to_frame()``.
+
+        Row positions refer to the frame the editor was given. Returns True
+        if the table changed.
+        """
+        if not state:
+            return False
+        edited = state.get("edited_rows") or {}
+        deleted = state.get("deleted_rows") or []
+        added = state.get("added_rows") or []
+        if not (edited or deleted or added):
+            return False
+        # The editor keeps its state until it is handed different data; don't apply it twice
+        signature = repr((sorted(edited.items()), sorted(deleted), added))
+        if self._applied == (self.version, signature):
+            return False
+
+        for i, changes in edited.items():
+            i = int(i)
+            if i < self.n:
+                self.update(i, changes.get(DIST_COL, _KEEP), changes.get(TIME_COL, _KEEP))
+        for i in sorted(deleted, reverse=True):
+            if i < self.n:
+                self.delete(i)
+        for row in added:
+            self.append(row.get(DIST_COL), row.get(TIME_COL))
+        self._applied = (self.version, signature)
+        return True
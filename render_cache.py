@@ -0,0 +1,196 @@
+"""Process-wide cache of finished oscilloscope images.
+
+Frames are keyed by their quantized parameters, so every session that
+lands on the same slider position shares one render. The in-memory tier
+is a size-bounded LRU; entries evicted from it can optionally spill to a
+directory on disk, from which they are promoted back on a hit. The disk
+tier is bounded too (oldest files are deleted first), and is written
+outside the lock so lookups never wait on disk I/O.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_SPILL_BYTES = 512 * 1024 * 1024
+
+
+def quantize(value, step):
+    # Slider values arrive as floats; map them onto their integer grid
+    return int(round(value / step))
+
+
+def phase_frame_key(freq, dist, temperature, seed=0, sample_rate=None):
+    # 100 Hz, 0.01 m and 0.1 degC steps, as on the sliders/inputs
+    return ("p2", quantize(freq, 100), quantize(dist, 0.01), quantize(temperature, 0.1), seed,
+            int(sample_rate) if sample_rate else 0)
+
+
+def frame_seed(key):
+    # Stable noise seed for a frame, so identical parameters always render identical images
+    return int.from_bytes(hashlib.sha1(repr(key).encode()).digest()[:8], "little")
+
+
+class RenderCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=None, max_spill_bytes=DEFAULT_MAX_SPILL_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._spilled = OrderedDict()  # file name -> size, oldest first
+        self._spill_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            # Files left by a previous run count towards the bound, oldest first
+            files = sorted((e for e in os.scandir(spill_dir) if e.name.endswith(".png")), key=lambda e: e.stat().st_mtime)
+            for entry in files:
+                self._spilled[entry.name] = entry.stat().st_size
+            self._spill_bytes = sum(self._spilled.values())
+            self._spill([])
+
+    def _spill_name(self, key):
+        return hashlib.sha1(repr(key).encode()).hexdigest() + ".png"
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, self._spill_name(key))
+
+    def _spill(self, evicted):
+        # Called without the lock: writing evicted frames never blocks other sessions' lookups
+        for key, data in evicted:
+            name = self._spill_name(key)
+            with self._lock:
+                if name in self._spilled:
+                    continue
+                self._spilled[name] = len(data)
+                self._spill_bytes += len(data)
+            path = os.path.join(self.spill_dir, name)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                with self._lock:
+                    if self._spilled.pop(name, None) is not None:
+                        self._spill_bytes -= len(data)
+        with self._lock:
+            dropped = []
+            while self._spill_bytes > self.max_spill_bytes and self._spilled:
+                name, size = self._spilled.popitem(last=False)
+                self._spill_bytes -= size
+                dropped.append(name)
+        for name in dropped:
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except OSError:
+                pass
+
+    def _read_spill(self, key):
+        try:
+            with open(self._spill_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _insert(self, key, data):
+        # Caller holds the lock; returns the evicted (key, data) pairs for the caller to spill
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        self._entries[key] = data
+        self._bytes += len(data)
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_data = self._entries.popitem(last=False)
+            self._bytes -= len(old_data)
+            self.evictions += 1
+            evicted.append((old_key, old_data))
+        return evicted if self.spill_dir else []
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+        if self.spill_dir:
+            data = self._read_spill(key)
+            if data is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    evicted = self._insert(key, data)
+                self._spill(evicted)
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data):
+        with self._lock:
+            evicted = self._insert(key, data)
+        if evicted:
+            self._spill(evicted)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or (bool(self.spill_dir) and self._spill_name(key) in self._spilled)
+
+    def get_or_render(self, key, render):
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "spill_bytes": self._spill_bytes,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            spilled, self._spilled = list(self._spilled), OrderedDict()
+            self._spill_bytes = 0
+        for name in spilled:
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except OSError:
+                pass
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    # One cache per server process. Size and spill directory come from the environment:
+    #   SIMULADOR_RENDER_CACHE_MB (default 64), SIMULADOR_RENDER_CACHE_DIR (disabled if unset),
+    #   SIMULADOR_RENDER_CACHE_DIR_MB (default 512)
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            max_mb = float(os.environ.get("SIMULADOR_RENDER_CACHE_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+            spill_mb = float(os.environ.get("SIMULADOR_RENDER_CACHE_DIR_MB", DEFAULT_MAX_SPILL_BYTES / 1024 / 1024))
+            _shared = RenderCache(int(max_mb * 1024 * 1024), spill_dir=os.environ.get("SIMULADOR_RENDER_CACHE_DIR") or None,
+                                  max_spill_bytes=int(spill_mb * 1024 * 1024))
+        return _shared
@@ -0,0 +1,133 @@
+"""Live ("run") mode of the Procedure II oscilloscope.
+
+A ``LiveScope`` keeps one session's acquisition in a fixed, preallocated
+ring buffer. Every frame only the samples acquired since the previous
+frame are synthesized and written in place; the screen is then read out
+from the newest data, starting at a rising CH1 edge when the trigger is
+on (a stable, real-scope-like picture) or at the newest samples when it
+is off (the trace rolls across the screen). Nothing is reallocated
+between frames while the frequency stays the same.
+
+Simulated time runs slowed down: the signal advances by ``SCROLL_RATE``
+screens per second of wall time, so the rolling trace can be followed.
+"""
+
+import time
+
+import numpy as np
+
+import engine
+
+FRAME_SECONDS = 0.2   # timer period of the live fragment (5 frames/s per student)
+SCROLL_RATE = 0.5     # screens of signal per second of wall time
+TRIGGER_LEVEL = 0.0   # CH1 rising edge
+
+
+class LiveScope:
+    def __init__(self, screen=engine.PHASE_SAMPLES, rng=None):
+        self.screen = screen
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.freq = None
+
+    def configure(self, freq, dist, temperature):
+        """Apply the current settings; only a new frequency restarts the acquisition."""
+        self.delay = float(dist / engine.speed_of_sound(temperature))
+        if freq == self.freq:
+            return
+        self.freq = float(freq)
+        self.window = float(engine.phase_window(freq))
+        self.rate = self.screen / self.window              # samples per second of signal
+        self.omega_step = 2 * np.pi * self.freq / self.rate  # phase advance per sample
+        self.search = int(np.ceil(self.rate / self.freq)) + 1  # one period: always holds a trigger
+        self.max_step = self.screen                          # samples synthesized per frame, at most
+        self.capacity = self.screen + self.search + self.max_step
+
+        self._ch1 = np.zeros(self.capacity)
+        self._ch2 = np.zeros(self.capacity)
+        self._head = 0       # next write position
+        self._count = 0      # valid samples in the ring
+        self._phase = 0.0    # CH1 phase of the next sample, mod 2 pi
+        self._carry = 0.0    # fractional samples owed by the frame timer
+        self._last = None
+
+        # Scratch space for one frame of new samples and for the linearized screen
+        self._idx = np.arange(self.max_step, dtype=float)
+        self._work = np.empty(self.max_step)
+        self._new1 = np.empty(self.max_step)
+        self._new2 = np.empty(self.max_step)
+        self._noise = np.empty(self.max_step)
+        self._view1 = np.empty(self.screen + self.search)
+        self._view2 = np.empty(self.screen + self.search)
+        self._below = np.empty(self.search, dtype=bool)
+        self._above = np.empty(self.search, dtype=bool)
+        self.time = np.arange(self.screen) / self.rate
+
+    def _synthesize(self, n):
+        work, new1, new2, noise = self._work[:n], self._new1[:n], self._new2[:n], self._noise[:n]
+        np.multiply(self._idx[:n], self.omega_step, out=work)
+        work += self._phase
+        np.sin(work, out=new1)
+        work -= 2 * np.pi * self.freq * self.delay
+        np.sin(work, out=new2)
+        new2 *= engine.MIC_GAIN
+        self.rng.standard_normal(out=noise)
+        noise *= engine.PHASE_NOISE
+        new2 += noise
+        self._phase = (self._phase + n * self.omega_step) % (2 * np.pi)
+
+        # Write into the ring, in two pieces when it wraps
+        first = min(n, self.capacity - self._head)
+        self._ch1[self._head:self._head + first] = new1[:first]
+        self._ch2[self._head:self._head + first] = new2[:first]
+        self._ch1[:n - first] = new1[first:]
+        self._ch2[:n - first] = new2[first:]
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def advance(self, now=None):
+        """Synthesize the samples acquired since the last frame; returns how many."""
+        now = time.monotonic() if now is None else now
+        if self._count < self.capacity:
+            wanted = self.capacity - self._count  # first frame: fill the screen and trigger search
+        else:
+            elapsed = 0.0 if self._last is None else now - self._last
+            self._carry += elapsed * SCROLL_RATE * self.screen
+            wanted = int(self._carry)
+            self._carry -= wanted
+            if wanted > self.capacity:
+                # After a long pause (a background tab) only the newest ring-full is ever shown:
+                # skip the rest, keeping the signal's phase where it would be
+                skipped = wanted - self.capacity
+                self._phase = (self._phase + skipped * self.omega_step) % (2 * np.pi)
+                wanted = self.capacity
+        self._last = now
+        done = 0
+        while done < wanted:
+            n = min(self.max_step, wanted - done)
+            self._synthesize(n)
+            done += n
+        return done
+
+    def frame(self, trigger=True):
+        """``(time, ch1, ch2)`` of the current screen.
+
+        The traces are views into buffers reused by the next frame; copy
+        them if they must outlive it.
+        """
+        span = self.screen + self.search
+        start = (self._head - span) % self.capacity
+        first = min(span, self.capacity - start)
+        self._view1[:first] = self._ch1[start:start + first]
+        self._view2[:first] = self._ch2[start:start + first]
+        self._view1[first:] = self._ch1[:span - first]
+        self._view2[first:] = self._ch2[:span - first]
+
+        offset = self.search  # untriggered: newest samples, the trace rolls
+        if trigger:
+            # Latest rising edge that still leaves a full screen after it
+            np.less(self._view1[:self.search], TRIGGER_LEVEL, out=self._below)
+            np.greater_equal(self._view1[1:self.search + 1], TRIGGER_LEVEL, out=self._above)
+            self._below &= self._above
+            if self._below.any():
+                offset = self.search - int(self._below[::-1].argmax())
+        return self.time, self._view1[offset:offset + self.screen], self._view2[offset:offset + self.screen]
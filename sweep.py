@@ -0,0 +1,98 @@
+"""Frequency x distance sweep of Procedure II.
+
+Every (freq, dist) setting of the sliders is synthesized and measured at
+once -- broadcasted over the grid, in chunks of traces so memory stays
+bounded -- giving the phase-difference map, the distances where CH1 and
+CH2 coincide (in phase) for each frequency and the wavelength read off
+the map.
+
+Usage:
+    python sweep.py --temperature 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import analysis
+import engine
+
+FREQS = np.arange(500, 3001, 100)                       # Hz, the frequency slider
+DISTANCES = np.round(np.arange(0, 1.5 + 1e-9, 0.01), 2)  # m, the distance slider
+DEFAULT_CHUNK = 1024  # traces per chunk: ~8 MB per 1000-sample channel array
+
+
+def phase_map(temperature=20.0, freqs=FREQS, dists=DISTANCES, chunk=DEFAULT_CHUNK, seed=0):
+    """Measured CH2-CH1 phase lag in degrees [0, 360), shape ``(len(freqs), len(dists))``."""
+    rng = np.random.default_rng(seed)
+    freq, dist = (a.ravel() for a in np.meshgrid(np.asarray(freqs, dtype=float), np.asarray(dists, dtype=float), indexing="ij"))
+    phase = np.empty(freq.size)
+    for start in range(0, freq.size, chunk):
+        rows = slice(start, start + chunk)
+        t, ch1, ch2 = engine.synthesize_phase_shift(freq[rows], dist[rows], temperature, rng=rng)
+        phase[rows] = analysis.estimate_phase_delay(t, ch1, ch2, freq[rows]) * freq[rows] * 360
+    return phase.reshape(len(freqs), len(dists)) % 360
+
+
+def unwrap_phase(phase):
+    # Along the distance axis, starting from the ~0 deg lag at the first distance
+    start = np.where(phase[:, :1] > 180, phase[:, :1] - 360, phase[:, :1])
+    return start + np.unwrap(phase - phase[:, :1], period=360, axis=1)
+
+
+def wavelengths(dists, unwrapped):
+    # Phase grows by 360 deg per wavelength: least-squares slope of every row at once
+    dx = dists - dists.mean()
+    dy = unwrapped - unwrapped.mean(axis=1, keepdims=True)
+    return 360 / ((dx * dy).sum(axis=1) / (dx * dx).sum())
+
+
+def coincidences(dists, unwrapped):
+    """Distances (past the origin) where CH2 is back in phase with CH1, one array per frequency."""
+    out = []
+    for row in np.maximum.accumulate(unwrapped, axis=1):
+        k = np.arange(1, int(row[-1] // 360) + 1)
+        out.append(np.interp(k * 360.0, row, dists))
+    return out
+
+
+def run(temperature=20.0, freqs=FREQS, dists=DISTANCES, chunk=DEFAULT_CHUNK, seed=0):
+    """Sweep the whole grid; returns a dict of arrays (see the module docstring)."""
+    freqs = np.asarray(freqs, dtype=float)
+    dists = np.asarray(dists, dtype=float)
+    start = time.perf_counter()
+    phase = phase_map(temperature, freqs, dists, chunk, seed)
+    unwrapped = unwrap_phase(phase)
+    wavelength = wavelengths(dists, unwrapped)
+    return {
+        "temperature": temperature,
+        "freqs": freqs,
+        "dists": dists,
+        "phase_deg": phase,
+        "coincidences": coincidences(dists, unwrapped),
+        "wavelength": wavelength,
+        "wavelength_theo": engine.speed_of_sound(temperature) / freqs,
+        "speed": wavelength * freqs,
+        "elapsed_s": time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varrimento frequência x distância do método do desfasamento")
+    parser.add_argument("--temperature", type=float, default=20.0)
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK)
+    args = parser.parse_args(argv)
+
+    result = run(args.temperature, chunk=args.chunk)
+    points = result["phase_deg"].size
+    print(f"{points:,d} pontos ({len(result['freqs'])} frequências x {len(result['dists'])} distâncias) "
+          f"em {result['elapsed_s'] * 1000:.0f} ms")
+    print(f"{'f (Hz)':>7} {'λ (m)':>8} {'λ teórico':>10} {'v (m/s)':>8}  coincidências (m)")
+    for f, lam, lam_theo, v, d in zip(result["freqs"], result["wavelength"], result["wavelength_theo"],
+                                      result["speed"], result["coincidences"]):
+        print(f"{f:7.0f} {lam:8.4f} {lam_theo:10.4f} {v:8.1f}  {', '.join(f'{x:.3f}' for x in d)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live at the repo root (run the tests from there: python -m pytest)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
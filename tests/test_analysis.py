@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import analysis
+import engine
+
+
+def test_impulse_delay_with_subsample_resolution():
+    t = engine.impulse_time_base()
+    ch1, ch2 = engine.synthesize_impulse(t, 0.04371, noise=0.0)
+    assert analysis.estimate_impulse_delay(t, ch1, ch2) == pytest.approx(0.04371, abs=5e-6)  # 50 us samples
+
+
+def test_batched_time_bases():
+    dts = (0.040, 0.045)
+    traces = [engine.synthesize_impulse(engine.impulse_time_base(n=n), dt, noise=0.0)
+              for n, dt in zip((2000, 3000), dts)]
+    ch1 = np.stack([c1[:2000] for c1, _ in traces])
+    ch2 = np.stack([c2[:2000] for _, c2 in traces])
+    spacing = np.array([engine.impulse_time_base(n=n)[1] for n in (2000, 3000)])
+    est = analysis.estimate_delay(ch1, ch2, spacing, min_lag=0.0, max_lag=0.1)
+    assert est.shape == (2,)
+    for k in range(2):
+        assert est[k] == pytest.approx(analysis.estimate_delay(ch1[k], ch2[k], spacing[k], 0.0, 0.1))
+    assert est[0] == pytest.approx(dts[0], abs=1e-5)
+
+
+def test_phase_delay_is_modulo_one_period():
+    freq, dist = 1500, 0.37
+    t, ch1, ch2 = engine.synthesize_phase_shift(freq, dist, 20.0, noise=0.0)
+    expected = dist / engine.speed_of_sound(20.0) % (1 / freq)
+    assert analysis.estimate_phase_delay(t, ch1, ch2, freq) == pytest.approx(expected, abs=1e-6)
+
+
+def test_hilbert_phase_matches_theory():
+    freq, dist = 1500, 0.37
+    t, ch1, ch2 = engine.synthesize_phase_shift(freq, np.array([0.2, dist]), 20.0, noise=0.0)
+    phase = analysis.hilbert_phase(ch1, ch2)
+    np.testing.assert_allclose(phase, engine.phase_difference_deg(freq, np.array([0.2, dist]), 20.0), atol=1.0)
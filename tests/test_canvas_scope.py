@@ -0,0 +1,25 @@
+import numpy as np
+
+import canvas_scope
+
+
+def test_int16_payload_round_trips_within_one_step():
+    t = np.linspace(0, 0.01, 1000)
+    ch1, ch2 = np.sin(2 * np.pi * 500 * t), 0.8 * np.cos(2 * np.pi * 500 * t)
+    payload = canvas_scope.encode_waveform(t, ch1, ch2, (-1.5, 1.5))
+    assert payload["t0"] == 0.0 and payload["dt"] == t[1] - t[0]
+    assert len(payload["ch1"]) == 2 * len(t)
+    decoded = np.frombuffer(payload["ch2"], dtype="<i2") * payload["scale"]
+    assert np.abs(decoded - ch2).max() <= payload["scale"] / 2
+
+
+def test_float32_payload_is_exact_to_float32():
+    t = np.arange(4) * 1e-3
+    payload = canvas_scope.encode_waveform(t, [0.1, 0.2, 0.3, 0.4], [1, 2, 3, 4], dtype="float32")
+    np.testing.assert_array_equal(np.frombuffer(payload["ch1"], dtype="<f4"), np.float32([0.1, 0.2, 0.3, 0.4]))
+
+
+def test_off_screen_samples_are_clipped_not_wrapped():
+    payload = canvas_scope.encode_waveform(np.arange(2.0), [100.0, -100.0], [0.0, 0.0], (-1, 1))
+    q = np.frombuffer(payload["ch1"], dtype="<i2")
+    assert q[0] == canvas_scope.INT16_MAX and q[1] == -canvas_scope.INT16_MAX
@@ -0,0 +1,72 @@
+import math
+import threading
+
+import numpy as np
+import pytest
+
+from class_store import ADD, REMOVE, RESET, ClassStore, ClassSummary
+
+
+def rows(*events):
+    return [(seq, *event) for seq, event in enumerate(events, 1)]
+
+
+def test_summary_fits_each_student_and_the_class():
+    summary = ClassSummary()
+    summary.apply(rows(*[("a", "phase", ADD, d, d / 340) for d in (0.1, 0.2, 0.3)],
+                       *[("b", "phase", ADD, d, d / 350) for d in (0.1, 0.2)]))
+    snap = summary.snapshot()["phase"]
+    assert snap["students"] == 2 and snap["points"] == 5
+    assert sorted(snap["speeds"]) == pytest.approx([340, 350])
+
+
+def test_remove_undoes_add():
+    summary = ClassSummary()
+    summary.apply(rows(("a", "phase", ADD, 0.1, 0.1 / 340), ("a", "phase", ADD, 0.2, 0.2 / 340),
+                       ("a", "phase", ADD, 0.3, 0.5), ("a", "phase", REMOVE, 0.3, 0.5)))
+    snap = summary.snapshot()["phase"]
+    assert snap["points"] == 2 and snap["speed"] == pytest.approx(340)
+
+
+def test_removing_a_point_from_before_a_reset_is_ignored():
+    summary = ClassSummary()
+    summary.apply(rows(("a", "phase", ADD, 0.1, 0.1 / 300), ("a", "phase", ADD, 0.2, 0.2 / 300),
+                       ("t", "", RESET, None, None),
+                       ("a", "phase", ADD, 0.3, 0.3 / 340),
+                       ("b", "phase", ADD, 0.1, 0.1 / 340), ("b", "phase", ADD, 0.2, 0.2 / 340),
+                       ("a", "phase", REMOVE, 0.1, 0.1 / 300)))
+    snap = summary.snapshot()["phase"]
+    assert snap["points"] == 3 and snap["students"] == 2
+    assert snap["speed"] == pytest.approx(340)
+
+
+def test_impulse_speed_is_mean_distance_over_mean_delay():
+    summary = ClassSummary()
+    summary.apply(rows(("a", "impulse", ADD, 15.0, 15.0 / 343), ("a", "impulse", ADD, 15.0, 15.0 / 343)))
+    snap = summary.snapshot()
+    assert snap["impulse"]["speed"] == pytest.approx(343)
+    assert math.isnan(snap["phase"]["speed"])
+
+
+def test_store_writes_in_batches_and_summary_is_incremental(tmp_path):
+    store = ClassStore(str(tmp_path / "turma.db"), flush_interval=0.01)
+    threads = [threading.Thread(target=lambda s=s: [store.add_point(s, "phase", d, d / 343) for d in (0.1, 0.2, 0.3)])
+               for s in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.flush()
+    snap = store.summary()
+    assert snap["phase"]["points"] == 9 and snap["phase"]["speed"] == pytest.approx(343)
+
+    store.remove_point("a", "phase", 0.3, 0.3 / 343)
+    store.reset("t")
+    store.add_point("b", "phase", 0.1, 0.1 / 343)
+    store.flush()
+    snap = store.summary()
+    assert snap["phase"]["points"] == 1 and snap["seq"] == 12
+    # Another process's view, rebuilt from the whole table, agrees
+    other = ClassStore(store.path).summary()
+    assert other["phase"]["points"] == 1
+    assert np.array_equal(other["phase"]["speeds"], snap["phase"]["speeds"])
@@ -0,0 +1,43 @@
+import numpy as np
+
+from decimation import lttb, minmax_decimate, xy_decimate
+
+
+def test_minmax_keeps_peaks_and_envelope():
+    t = np.arange(100_000) / 1e6
+    y = np.random.default_rng(0).standard_normal((2, t.size)) * 0.1
+    y[0, 12_345] = 5.0
+    y[1, 99_999] = -5.0
+    t_dec, d0, d1 = minmax_decimate(t, y[0], y[1], n_buckets=500)
+    assert t_dec.shape == d0.shape == d1.shape == (1000,)
+    assert d0.max() == 5.0 and d1.min() == -5.0
+    assert d0.min() == y[0].min()
+    np.testing.assert_allclose(np.diff(t_dec), np.diff(t_dec)[0])
+
+
+def test_minmax_works_on_batches_and_leaves_short_records_alone():
+    t = np.arange(10_000.0)
+    batch = np.random.default_rng(1).standard_normal((3, 10_000))
+    _, dec = minmax_decimate(t, batch, n_buckets=100)
+    assert dec.shape == (3, 200)
+    for row, full in zip(dec, batch):
+        assert row.max() == full.max() and row.min() == full.min()
+    short = minmax_decimate(t[:150], batch[0, :150], n_buckets=100)
+    assert np.array_equal(short[1], batch[0, :150])
+
+
+def test_lttb_keeps_the_ends_and_the_spike():
+    x = np.arange(1000.0)
+    y = np.zeros(1000)
+    y[500] = 1.0
+    xs, ys = lttb(x, y, 50)
+    assert len(xs) == 50 and xs[0] == 0 and xs[-1] == 999
+    assert ys.max() == 1.0
+
+
+def test_xy_decimate_keeps_channels_aligned():
+    ch1 = np.arange(10_000.0)
+    ch2 = ch1 * 2
+    a, b = xy_decimate(ch1, ch2, n_points=1000)
+    assert len(a) <= 1000 and np.array_equal(b, a * 2)
+    assert np.shares_memory(a, ch1)
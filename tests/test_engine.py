@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import engine
+
+
+def test_speed_of_sound():
+    assert engine.speed_of_sound(0.0) == pytest.approx(engine.V0)
+    assert engine.impulse_delay(20.0) == pytest.approx(engine.HOSE_LENGTH / (engine.V0 + 20 * engine.DV_DT))
+
+
+def test_batched_synthesis_matches_single_traces():
+    t = engine.impulse_time_base()
+    dt = np.array([0.043, 0.044])
+    batch = engine.hose_response(t, dt, 20.0)
+    for i in range(2):
+        np.testing.assert_allclose(batch[i], engine.hose_response(t, dt[i], 20.0), atol=1e-12)
+
+
+def test_hose_echo_is_inside_the_window():
+    t = engine.impulse_time_base()
+    dt = engine.impulse_delay(20.0)
+    y = engine.hose_response(t, dt, 20.0)
+    echo = t[y.argmin()]  # the end reflection inverts the pulse
+    assert echo == pytest.approx(engine.PULSE_T0 + 3 * dt, abs=0.005)
+    assert echo < t[-1]
+
+
+def test_batched_scratch_space_does_not_outlive_the_call():
+    t = engine.impulse_time_base()
+    engine.hose_response(t, np.full(8, 0.0437), 20.0)
+    assert getattr(engine._buffers, "shift", None) is None or engine._buffers.shift.ndim == 1
+    engine.hose_response(t, 0.0437, 20.0)
+    assert engine._buffers.shift.ndim == 1
+
+
+def test_phase_shift_is_reproducible_with_a_seed():
+    a = engine.synthesize_phase_shift(1500, 0.37, 20.0, rng=np.random.default_rng(3))
+    b = engine.synthesize_phase_shift(1500, 0.37, 20.0, rng=np.random.default_rng(3))
+    for x, y in zip(a, b):
+        np.testing.assert_array_equal(x, y)
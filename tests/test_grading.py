@@ -0,0 +1,63 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+import grading
+
+
+def test_checks_work_on_scalars_and_columns():
+    assert grading.check_time(43.9, 43.7)
+    assert not grading.check_time(44.3, 43.7)
+    assert list(grading.check_time([43.9, 45.0], 43.7)) == [True, False]
+    assert grading.expected_speed(50.0) == pytest.approx(300.0)
+    assert np.isnan(grading.expected_speed(0.0))
+    assert grading.check_speed(300.5, 50.0)
+
+
+def test_expected_dt_is_peak_to_peak_in_the_hose():
+    dt = engine.impulse_delay(20.0)
+    assert grading.expected_dt_ms(dt, 20.0, "delay") == pytest.approx(dt * 1000)
+    for jittered in (0.97 * dt, dt, 1.03 * dt):
+        exact = engine.hose_peak_delay(jittered, 20.0) * 1000
+        assert grading.expected_dt_ms(jittered, 20.0, "hose") == pytest.approx(exact, abs=1e-4)
+    assert grading.expected_dt_ms(dt, 20.0, "hose") > dt * 1000 + 0.5
+
+
+def test_batch_grader_uses_the_same_target_as_the_ui():
+    dt = engine.impulse_delay(20.0)
+    ui_target = float(grading.expected_dt_ms(dt, 20.0, "hose"))
+    answer = ui_target + 0.3  # passes in the app, more than 0.5 ms from the pure delay
+    df = pd.DataFrame({"temperature": [20.0, 20.0, 20.0], "actual_dt_ms": [dt * 1000] * 3,
+                       "model": ["hose", None, "delay"], "user_dt_ms": [answer] * 3})
+    report = grading.grade_frame(df)
+    assert list(report["time_ok"]) == [True, True, False]
+    assert report["expected_dt_ms"][0] == pytest.approx(ui_target)
+    assert not grading.grade_frame(df.drop(columns="model"), model="delay")["time_ok"].any()
+
+
+def test_procedure_ii_regression_per_student():
+    df = pd.DataFrame({"temperature": [20.0, 20.0],
+                       "p2_distances": [[0.1, 0.2, 0.3], [0.1, 0.2]],
+                       "p2_delays_ms": [[d / 340 * 1000 for d in (0.1, 0.2, 0.3)], [d / 350 * 1000 for d in (0.1, 0.2)]]})
+    report = grading.grade_frame(df)
+    assert list(report["v_p2"]) == pytest.approx([340.0, 350.0])
+    assert list(report["p2_points"]) == [3, 2]
+
+
+def test_large_frames_grade_without_a_trace_per_row():
+    rows = 50_000
+    rng = np.random.default_rng(0)
+    temperature = rng.choice([15.0, 20.0, 25.0], rows)
+    dt_ms = engine.impulse_delay(temperature) * 1000 * rng.uniform(0.97, 1.03, rows)
+    df = pd.DataFrame({"temperature": temperature, "actual_dt_ms": dt_ms, "user_dt_ms": dt_ms + 0.7})
+    tracemalloc.start()
+    try:
+        report = grading.grade_frame(df)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(report) == rows and report["time_ok"].all()
+    assert peak < 100 * 2**20
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import engine
+import montecarlo
+
+
+@pytest.mark.parametrize("procedure", ["impulse", "phase"])
+def test_speeds_center_on_theory(procedure):
+    result = montecarlo.run(procedure, 20.0, 200, seed=1)
+    v_theo = engine.speed_of_sound(20.0)
+    assert result["v"].shape == (200,)
+    assert abs(np.median(result["v"]) - v_theo) / v_theo < 0.02
+    np.testing.assert_allclose(result["error_pct"], np.abs(result["v"] - v_theo) / v_theo * 100)
+
+
+def test_chunking_and_seed_are_reproducible():
+    a = montecarlo.run("impulse", 20.0, 300, chunk=128, seed=7)
+    b = montecarlo.run("impulse", 20.0, 300, chunk=128, seed=7)
+    np.testing.assert_array_equal(a["v"], b["v"])
+
+
+def test_summarize():
+    s = montecarlo.summarize(np.arange(101.0))
+    assert s["mean"] == 50 and s["p5"] == 5 and s["p50"] == 50 and s["p95"] == 95
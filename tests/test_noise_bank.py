@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import noise_bank
+
+
+def test_same_seed_same_noise():
+    a, b = noise_bank.BankedNoise(42), noise_bank.BankedNoise(42)
+    np.testing.assert_array_equal(a.standard_normal(1000), b.standard_normal(1000))
+
+
+def test_successive_draws_are_different_read_only_views():
+    noise = noise_bank.BankedNoise(7)
+    x, y = noise.standard_normal((2, 500)), noise.standard_normal(1000)
+    assert not np.shares_memory(x, y)
+    assert np.shares_memory(x, noise_bank.bank())
+    with pytest.raises(ValueError):
+        x[0, 0] = 1.0
+
+
+def test_draws_wrap_around_the_end_of_the_bank():
+    noise = noise_bank.BankedNoise(noise_bank.BANK_SIZE - 10)
+    assert noise.standard_normal(100).shape == (100,)
+
+
+def test_draws_larger_than_the_bank_use_a_generator():
+    noise = noise_bank.BankedNoise(3)
+    big = noise.standard_normal(noise_bank.BANK_SIZE + 1)
+    assert big.shape == (noise_bank.BANK_SIZE + 1,) and big.flags.writeable
+
+
+def test_session_seed_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SIMULADOR_SEED", "1234")
+    assert noise_bank.new_session_seed() == 1234
+    monkeypatch.delenv("SIMULADOR_SEED")
+    assert noise_bank.new_session_seed() != noise_bank.new_session_seed()
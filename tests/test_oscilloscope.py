@@ -0,0 +1,23 @@
+import engine
+from oscilloscope import OscilloscopeRenderer
+
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+def test_frames_are_pngs_and_deterministic():
+    t, ch1, ch2 = engine.synthesize_phase_shift(1500, 0.1, 20.0, noise=0.0)
+    with OscilloscopeRenderer(dpi=50) as renderer:
+        first = renderer.render_png(t, ch1, ch2, (0, t[-1]), (-1.5, 1.5))
+        renderer.render_png(t, ch2, ch1, (0, 2 * t[-1]), (-1.5, 1.5))
+        again = renderer.render_png(t, ch1, ch2, (0, t[-1]), (-1.5, 1.5))
+    assert first.startswith(PNG) and first == again
+
+
+def test_switching_between_xy_and_yt():
+    t, ch1, ch2 = engine.synthesize_phase_shift(1500, 0.1, 20.0, noise=0.0)
+    with OscilloscopeRenderer(dpi=50) as renderer:
+        yt = renderer.render_png(t, ch1, ch2, (0, t[-1]), (-1.5, 1.5))
+        xy = renderer.render_xy_png(ch1, ch2, (-1.5, 1.5), (-1.5, 1.5))
+        assert xy.startswith(PNG) and xy != yt
+        assert renderer.render_png(t, ch1, ch2, (0, t[-1]), (-1.5, 1.5)) == yt
+    assert renderer.closed
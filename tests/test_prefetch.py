@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import prefetch
+from render_cache import RenderCache
+
+
+@pytest.fixture
+def prefetcher():
+    p = prefetch.Prefetcher(RenderCache(), workers=1, per_session=2, max_pending=3, max_wait=5.0)
+    yield p
+    p.shutdown()
+
+
+def blocking(gate, started=None):
+    def render(renderer):
+        if started is not None:
+            started.set()
+        gate.wait(5)
+        return b"png"
+    return render
+
+
+def done(key):
+    return lambda renderer: key.encode()
+
+
+def drain(p):
+    p._pool.submit(lambda: None).result(5)
+
+
+def test_submit_renders_into_cache(prefetcher, monkeypatch):
+    monkeypatch.setattr(prefetch, "_renderer", lambda: None)
+    assert prefetcher.submit("s", [("a", done("a")), ("b", done("b"))]) == 2
+    drain(prefetcher)
+    assert prefetcher.cache.get("a") == b"a" and prefetcher.cache.get("b") == b"b"
+    assert prefetcher.pending() == 0
+    assert prefetcher.submit("s", [("a", done("a"))]) == 0  # already cached
+
+
+def test_replacing_a_queued_request_keeps_the_new_jobs(prefetcher, monkeypatch):
+    monkeypatch.setattr(prefetch, "_renderer", lambda: None)
+    gate, started = threading.Event(), threading.Event()
+    prefetcher.submit("other", [("x", blocking(gate, started))])
+    started.wait(5)
+    prefetcher.submit("s", [("a", done("a"))])
+    prefetcher.submit("s", [("b", done("b")), ("c", done("c"))])
+    assert prefetcher.pending("s") == 2
+    assert prefetcher.stats["cancelled"] == 1
+    gate.set()
+    drain(prefetcher)
+    assert "a" not in prefetcher.cache
+    assert prefetcher.cache.get("b") == b"b" and prefetcher.cache.get("c") == b"c"
+    assert prefetcher.stats["rendered"] == 3 and prefetcher.stats["skipped"] == 0
+
+
+def test_limits_drop_extra_jobs(prefetcher, monkeypatch):
+    monkeypatch.setattr(prefetch, "_renderer", lambda: None)
+    gate, started = threading.Event(), threading.Event()
+    prefetcher.submit("other", [("x", blocking(gate, started))])
+    started.wait(5)
+    assert prefetcher.submit("s", [(k, done(k)) for k in "abc"]) == 2   # per session: 2
+    assert prefetcher.submit("t", [("d", done("d"))]) == 0              # per process: 3, with "other"'s
+    assert prefetcher.stats["dropped"] == 2
+    gate.set()
+    drain(prefetcher)
+
+
+def test_jobs_wait_for_foreground_reruns(prefetcher, monkeypatch):
+    monkeypatch.setattr(prefetch, "_renderer", lambda: None)
+    prefetcher.max_wait = 0.05
+    prefetcher.foreground_started()
+    prefetcher.submit("s", [("a", done("a"))])
+    drain(prefetcher)
+    prefetcher.foreground_finished()
+    assert "a" not in prefetcher.cache
+    assert prefetcher.stats["expired"] == 1
+
+
+def test_foreground_joins_a_frame_being_rendered(prefetcher, monkeypatch):
+    monkeypatch.setattr(prefetch, "_renderer", lambda: None)
+    gate, started = threading.Event(), threading.Event()
+    prefetcher.submit("s", [("a", blocking(gate, started))])
+    started.wait(5)
+    threading.Timer(0.05, gate.set).start()
+    assert prefetcher.get_or_render("a", lambda: pytest.fail("rendered twice")) == b"png"
+
+
+def test_neighbours_stay_in_range():
+    assert prefetch.neighbours(0.37, 0.01, 0.0, 1.5) == [0.38, 0.36]
+    assert prefetch.neighbours(500, 100, 500, 3000) == [600]
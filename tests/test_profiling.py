@@ -0,0 +1,67 @@
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import profiling
+
+
+@pytest.fixture(autouse=True)
+def no_tracing(monkeypatch):
+    monkeypatch.setattr(profiling, "ALLOC_MODE", "ui")
+    profiling._alloc_sessions.clear()
+    yield
+    profiling._alloc_sessions.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_sections_are_timed_and_recorded(monkeypatch):
+    monkeypatch.setattr(profiling, "_recorder", profiling.Recorder())
+    profiling.begin("s", "phase")
+    with profiling.section("synthesis"):
+        time.sleep(0.01)
+    with profiling.section("synthesis"):
+        pass
+    record = profiling.end()
+    assert record["stages"]["synthesis"]["s"] >= 0.01
+    assert record["stages"]["synthesis"]["alloc_bytes"] is None
+    assert profiling.recorder().summary("phase")["synthesis"]["n"] == 1
+    with profiling.section("outside a rerun"):
+        pass  # no profile open: a no-op
+
+
+def test_one_session_cannot_stop_another_sessions_tracing():
+    profiling.trace_allocations("teacher", True)
+    profiling.trace_allocations("other", False)
+    assert tracemalloc.is_tracing()
+    profiling.trace_allocations("teacher", False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_allocations_are_measured_one_section_at_a_time():
+    profiling.trace_allocations("teacher", True)
+    inside, overlap = [0], []
+
+    def rerun(size):
+        profile = profiling.begin(f"s{size}", "phase")
+        with profiling.section("work"):
+            inside[0] += 1
+            overlap.append(inside[0])
+            data = np.ones(size)
+            time.sleep(0.02)
+            inside[0] -= 1
+            del data
+        return profile
+
+    profiles = []
+    threads = [threading.Thread(target=lambda n=n: profiles.append(rerun(n))) for n in (100_000, 200_000)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(overlap) == 1
+    allocs = sorted(p.stages["work"][1] for p in profiles)
+    assert allocs[0] >= 800_000 and allocs[1] >= 1_600_000
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pytest
+
+from regression import DIST_COL, TIME_COL, MeasurementTable, RunningFit
+
+
+def test_running_fit_matches_polyfit():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 0.005, 20)
+    y = 343 * x + rng.normal(0, 0.01, 20)
+    fit = RunningFit()
+    for xi, yi in zip(x, y):
+        fit.add(xi, yi)
+    slope, intercept = np.polyfit(x, y, 1)
+    assert fit.slope == pytest.approx(slope) and fit.intercept == pytest.approx(intercept)
+    fit.remove(x[0], y[0])
+    assert fit.slope == pytest.approx(np.polyfit(x[1:], y[1:], 1)[0])
+
+
+def test_table_keeps_the_fit_in_sync():
+    table = MeasurementTable(capacity=2)
+    for d in (0.1, 0.2, 0.3):
+        table.append(d, d / 343 * 1000)
+    table.append(0.4, None)                   # incomplete row: kept, not fitted
+    assert len(table) == 4 and table.fit.n == 3
+    assert table.fit.slope == pytest.approx(343)
+    table.update(3, time_ms=0.4 / 343 * 1000)
+    table.delete(0)
+    assert table.fit.n == 3 and table.fit.slope == pytest.approx(343)
+
+
+def test_points_are_reported_as_they_enter_and_leave():
+    table = MeasurementTable()
+    events = []
+    table.on_point = lambda op, point: events.append(op)
+    table.append(0.1, 0.3)
+    table.update(0, time_ms=0.31)
+    table.delete(0)
+    assert events == [1, -1, 1, -1]
+
+
+def test_editor_state_is_applied_once():
+    table = MeasurementTable()
+    table.append(0.1, 0.3)
+    state = {"edited_rows": {0: {TIME_COL: 0.29}}, "added_rows": [{DIST_COL: 0.2, TIME_COL: 0.58}],
+             "deleted_rows": []}
+    assert table.apply_editor_state(state)
+    assert not table.apply_editor_state(state)
+    assert len(table) == 2 and table.delays_ms[0] == 0.29
+    assert not math.isnan(table.fit.slope)
@@ -0,0 +1,80 @@
+import os
+import threading
+
+from render_cache import RenderCache, frame_seed, phase_frame_key
+
+
+def test_lru_eviction_by_size():
+    cache = RenderCache(max_bytes=30)
+    for key in "abc":
+        cache.put(key, b"x" * 10)
+    cache.get("a")              # most recently used
+    cache.put("d", b"x" * 10)   # evicts b
+    assert "b" not in cache and "a" in cache and "d" in cache
+    stats = cache.stats()
+    assert stats["bytes"] == 30 and stats["evictions"] == 1
+
+
+def test_get_or_render_renders_once():
+    cache = RenderCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_render("k", lambda: calls.append(1) or b"png") == b"png"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_spill_to_disk_and_promote_back(tmp_path):
+    cache = RenderCache(max_bytes=10, spill_dir=str(tmp_path))
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)   # a goes to disk
+    assert "a" in cache and len(os.listdir(tmp_path)) == 1
+    assert cache.get("a") == b"a" * 10
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = RenderCache(max_bytes=10, spill_dir=str(tmp_path), max_spill_bytes=25)
+    for i in range(6):
+        cache.put(i, bytes([i]) * 10)
+    assert cache.stats()["spill_bytes"] <= 25
+    assert len(os.listdir(tmp_path)) == 2
+    assert 0 not in cache and 4 in cache
+    # A new process sees the files already there and keeps the same bound
+    again = RenderCache(max_bytes=10, spill_dir=str(tmp_path), max_spill_bytes=15)
+    assert again.stats()["spill_bytes"] == 10 and len(os.listdir(tmp_path)) == 1
+
+
+def test_clear_resets_the_disk_tier(tmp_path):
+    cache = RenderCache(max_bytes=10, spill_dir=str(tmp_path))
+    for i in range(3):
+        cache.put(i, b"x" * 10)
+    cache.clear()
+    assert cache.stats()["spill_bytes"] == 0 and cache.stats()["entries"] == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_spilling_does_not_hold_the_lock(tmp_path, monkeypatch):
+    cache = RenderCache(max_bytes=10, spill_dir=str(tmp_path))
+    writing, release = threading.Event(), threading.Event()
+    real_open = open
+
+    def slow_open(path, mode="r", *args, **kwargs):
+        if "w" in mode:
+            writing.set()
+            release.wait(5)
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", slow_open)
+    cache.put("a", b"a" * 10)
+    spiller = threading.Thread(target=cache.put, args=("b", b"b" * 10))
+    spiller.start()
+    writing.wait(5)
+    assert cache.get("b") == b"b" * 10   # would deadlock if the write held the lock
+    release.set()
+    spiller.join()
+
+
+def test_frame_keys_follow_the_slider_grid():
+    assert phase_frame_key(1500.0000001, 0.37, 20.0) == phase_frame_key(1500, 0.370000001, 20.0)
+    assert frame_seed(phase_frame_key(1500, 0.37, 20.0)) == frame_seed(phase_frame_key(1500, 0.37, 20.0))
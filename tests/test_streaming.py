@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import engine
+import streaming
+
+
+def scope(freq=1500, dist=0.0):
+    live = streaming.LiveScope(rng=np.random.default_rng(0))
+    live.configure(freq, dist, 20.0)
+    live.advance(now=0.0)
+    return live
+
+
+def test_first_frame_fills_the_ring():
+    live = scope()
+    assert live._count == live.capacity
+    t, ch1, ch2 = live.frame()
+    assert len(t) == len(ch1) == len(ch2) == live.screen
+
+
+def test_frames_advance_with_wall_time():
+    live = scope()
+    assert live.advance(now=0.2) == int(0.2 * streaming.SCROLL_RATE * live.screen)
+
+
+def test_long_pause_is_capped_at_the_ring_size():
+    live = scope()
+    phase = live._phase
+    pause = 600.0
+    assert live.advance(now=pause) == live.capacity
+    # The signal continues where it would have been after the whole pause
+    owed = int(pause * streaming.SCROLL_RATE * live.screen)
+    assert live._phase == pytest.approx((phase + owed * live.omega_step) % (2 * np.pi), abs=1e-6)
+
+
+def test_trigger_starts_the_screen_on_a_rising_edge():
+    live = scope()
+    live.advance(now=0.37)
+    _, ch1, _ = live.frame(trigger=True)
+    assert ch1[0] >= streaming.TRIGGER_LEVEL - 0.1
+    assert ch1[1] > ch1[0]
+
+
+def test_changing_the_distance_keeps_the_acquisition():
+    live = scope()
+    head = live._head
+    live.configure(1500, 0.2, 20.0)
+    assert live._head == head
+    assert live.delay == pytest.approx(0.2 / engine.speed_of_sound(20.0))
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+import engine
+import sweep
+
+
+def test_phase_map_matches_theory():
+    freqs, dists = np.array([1000.0, 2000.0]), np.array([0.0, 0.05, 0.1])
+    phase = sweep.phase_map(20.0, freqs, dists, chunk=4)
+    expected = engine.phase_difference_deg(freqs[:, None], dists[None, :], 20.0) % 360
+    diff = (phase - expected + 180) % 360 - 180
+    assert phase.shape == (2, 3) and np.abs(diff).max() < 2.0
+
+
+def test_wavelengths_and_coincidences():
+    freqs = np.array([1000.0, 2500.0])
+    result = sweep.run(20.0, freqs, sweep.DISTANCES)
+    np.testing.assert_allclose(result["wavelength"], result["wavelength_theo"], rtol=0.01)
+    # CH2 is back in phase every wavelength
+    for row, wavelength in zip(result["coincidences"], result["wavelength_theo"]):
+        np.testing.assert_allclose(row, wavelength * np.arange(1, len(row) + 1), atol=0.01)
+    assert result["speed"] == pytest.approx(engine.speed_of_sound(20.0), rel=0.01)
@@ -0,0 +1,53 @@
+"""Background import of heavy modules after the first page has been sent.
+
+``app.py`` imports matplotlib, scipy and pandas only in the procedure that
+needs them. To keep the *first* visit to those procedures fast as well,
+the first script run starts one daemon thread per process that imports
+them in the background; later ``import`` statements then hit
+``sys.modules``.
+"""
+
+import importlib
+import os
+import threading
+import time
+
+HEAVY_MODULES = (
+    "matplotlib.figure",
+    "matplotlib.backends.backend_agg",
+    "PIL.Image",
+    "oscilloscope",
+    "pandas",
+    "scipy.signal",
+    "analysis",
+    "montecarlo",
+)
+
+_started = False
+_lock = threading.Lock()
+timings = {}  # module -> import seconds, filled in by the warm-up thread
+
+
+def _warm(modules, delay):
+    time.sleep(delay)  # let the first render go out before competing for the GIL
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = time.perf_counter() - start
+
+
+def start(modules=HEAVY_MODULES, delay=0.5):
+    """Start the warm-up thread once per process; returns False if already started.
+
+    Setting ``SIMULADOR_WARMUP=0`` disables it (used to measure cold starts).
+    """
+    global _started
+    with _lock:
+        if _started or os.environ.get("SIMULADOR_WARMUP") == "0":
+            return False
+        _started = True
+    threading.Thread(target=_warm, args=(modules, delay), name="import-warmup", daemon=True).start()
+    return True